@@ -0,0 +1,223 @@
+
+# armazenamento.py
+
+import ast
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from codificacao import codificar_solucao, decodificar_solucao
+
+# Arquivos cujo conteúdo define a versão do código registrada em cada resultado:
+# só os módulos que produzem as soluções. Ferramentas (benchmark, gerador,
+# consolidação, perfil, armazenamento, main) podem mudar sem invalidar as
+# execuções já concluídas.
+PADROES_CODIGO = ("parser.py", "instancia.py", "utils.py", "solucao.py", "indice_espacial.py",
+                  "heuristics/*.py", "metaheuristics/*.py")
+
+def versao_codigo(raiz=None):
+    """
+    Hash curto do código que produz as soluções (PADROES_CODIGO). Resultados
+    de uma versão diferente do código não são considerados já concluídos.
+    """
+    raiz = raiz or os.path.dirname(os.path.abspath(__file__))
+    sha = hashlib.sha1()
+    arquivos = sorted(f for padrao in PADROES_CODIGO for f in glob.glob(os.path.join(raiz, padrao)))
+    for arquivo in arquivos:
+        sha.update(os.path.relpath(arquivo, raiz).encode())
+        with open(arquivo, "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()[:12]
+
+# Colunas de resultados, na ordem do esquema atual
+COLUNAS_RESULTADOS = ("instancia", "metodo", "config", "semente", "versao", "custo", "tempo",
+                      "qtd_rotas", "qtd_veiculos", "intensificacao", "diversificacao",
+                      "criado_em")
+ESQUEMA_RESULTADOS = """
+    CREATE TABLE IF NOT EXISTS {tabela} (
+        instancia TEXT NOT NULL,
+        metodo TEXT NOT NULL,
+        config TEXT NOT NULL,
+        semente INTEGER NOT NULL,
+        versao TEXT NOT NULL,
+        custo REAL,
+        tempo REAL,
+        qtd_rotas INTEGER,
+        qtd_veiculos INTEGER,
+        intensificacao TEXT,
+        diversificacao TEXT,
+        criado_em REAL,
+        PRIMARY KEY (instancia, metodo, config, semente, versao)
+    )"""
+
+def chave_config(config):
+    """Representação canônica da configuração ("" para heurísticas construtivas)."""
+    return json.dumps(config, sort_keys=True) if config else ""
+
+class ArmazemResultados:
+    """
+    Armazém de resultados em SQLite, com uma linha por execução, chaveada por
+    (instância, método, configuração, semente, versão do código).
+    Cada resultado é confirmado (commit) assim que é gravado, então uma
+    interrupção perde no máximo a execução em andamento; regravar a mesma
+    chave substitui a linha em vez de duplicá-la.
+    As soluções ficam em uma tabela à parte, codificadas (codificacao.py), de
+    modo que consultas de resumo não leem os payloads.
+    Execuções com perfil (perfil.py) são mais lentas e não substituem a linha
+    cronometrada: o perfil e o tempo medido com ele vão para a tabela perfis,
+    cujas colunas linhas() acrescenta às da execução correspondente.
+    """
+
+    def __init__(self, caminho):
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        self.caminho = caminho
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.execute(ESQUEMA_RESULTADOS.format(tabela="resultados"))
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS solucoes (
+                instancia TEXT NOT NULL,
+                metodo TEXT NOT NULL,
+                config TEXT NOT NULL,
+                semente INTEGER NOT NULL,
+                versao TEXT NOT NULL,
+                rotas BLOB NOT NULL,
+                PRIMARY KEY (instancia, metodo, config, semente, versao)
+            )""")
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS perfis (
+                instancia TEXT NOT NULL,
+                metodo TEXT NOT NULL,
+                config TEXT NOT NULL,
+                semente INTEGER NOT NULL,
+                versao TEXT NOT NULL,
+                tempo REAL,
+                perfil TEXT NOT NULL,
+                criado_em REAL,
+                PRIMARY KEY (instancia, metodo, config, semente, versao)
+            )""")
+        self.conexao.commit()
+        self._migrar()
+
+    def _migrar(self):
+        """Atualiza armazéns criados com esquemas anteriores de resultados."""
+        colunas = {c[1] for c in self.conexao.execute("PRAGMA table_info(resultados)")}
+        with self.conexao:
+            # Antes da tabela perfis: a execução com perfil substituía a linha
+            # cronometrada (resultados.perfil). Move o perfil para perfis e
+            # apaga a linha, cujo tempo foi medido com o perfil ativo, para
+            # que a execução seja refeita sem ele.
+            if "perfil" in colunas:
+                cursor = self.conexao.execute(
+                    "SELECT instancia, metodo, config, semente, versao, tempo, perfil, criado_em "
+                    "FROM resultados WHERE perfil IS NOT NULL")
+                for linha in cursor.fetchall():
+                    self.conexao.execute("INSERT OR IGNORE INTO perfis VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                         linha)
+                    for tabela in ("resultados", "solucoes"):
+                        self.conexao.execute(
+                            f"DELETE FROM {tabela} WHERE instancia = ? AND metodo = ? AND config = ? "
+                            "AND semente = ? AND versao = ?", linha[:5])
+            # Antes da tabela solucoes: a solução ficava em resultados.solucao
+            # como texto (str da lista de rotas). Move para solucoes, codificada.
+            if "solucao" in colunas:
+                cursor = self.conexao.execute(
+                    "SELECT instancia, metodo, config, semente, versao, solucao FROM resultados "
+                    "WHERE solucao IS NOT NULL")
+                for *chave, texto in cursor.fetchall():
+                    self.conexao.execute(
+                        "INSERT OR IGNORE INTO solucoes VALUES (?, ?, ?, ?, ?, ?)",
+                        tuple(chave) + (codificar_solucao(ast.literal_eval(texto)),))
+            # Recria resultados só com as colunas do esquema atual
+            if "perfil" in colunas or "solucao" in colunas:
+                lista = ", ".join(COLUNAS_RESULTADOS)
+                self.conexao.execute(ESQUEMA_RESULTADOS.format(tabela="resultados_migracao"))
+                self.conexao.execute(f"INSERT INTO resultados_migracao ({lista}) "
+                                     f"SELECT {lista} FROM resultados")
+                self.conexao.execute("DROP TABLE resultados")
+                self.conexao.execute("ALTER TABLE resultados_migracao RENAME TO resultados")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def fechar(self):
+        self.conexao.close()
+
+    def concluidas(self, versao):
+        """Conjunto de chaves (instancia, metodo, config, semente) já gravadas na versão."""
+        cursor = self.conexao.execute(
+            "SELECT instancia, metodo, config, semente FROM resultados WHERE versao = ?", (versao,))
+        return set(cursor.fetchall())
+
+    def perfiladas(self, versao):
+        """Conjunto de chaves (instancia, metodo, config, semente) com perfil gravado na versão."""
+        cursor = self.conexao.execute(
+            "SELECT instancia, metodo, config, semente FROM perfis WHERE versao = ?", (versao,))
+        return set(cursor.fetchall())
+
+    def gravar(self, resultado, versao):
+        """
+        Grava uma linha de resultado (com as colunas usadas em main.py, mais
+        "Config" e "Semente"; "Solucao" é a lista de rotas) e confirma
+        imediatamente, junto com a solução codificada. Se o resultado tem
+        "Perfil" (dict de colunas extras do perfil), é de uma execução com
+        perfil: só o perfil e seu tempo são gravados, em perfis.
+        """
+        perfil = resultado.get("Perfil")
+        chave = (resultado["Instancia"], resultado["Metodo"], resultado["Config"],
+                 resultado["Semente"], versao)
+        if perfil:
+            with self.conexao:
+                self.conexao.execute(
+                    "INSERT OR REPLACE INTO perfis VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    chave + (resultado["Tempo (s)"], json.dumps(perfil), time.time()))
+            return
+        with self.conexao:
+            self.conexao.execute(
+                f"INSERT OR REPLACE INTO resultados ({', '.join(COLUNAS_RESULTADOS)}) "
+                f"VALUES ({', '.join('?' * len(COLUNAS_RESULTADOS))})",
+                chave + (resultado["Custo"], resultado["Tempo (s)"],
+                         resultado["Qtd Rotas"], resultado["Qtd Veiculos"],
+                         str(resultado["Intensificacao"]), str(resultado["Diversificacao"]),
+                         time.time()))
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO solucoes VALUES (?, ?, ?, ?, ?, ?)",
+                chave + (codificar_solucao(resultado["Solucao"]),))
+
+    def solucao(self, instancia, metodo, config, semente, versao):
+        """Retorna a lista de rotas gravada para a execução, ou None."""
+        linha = self.conexao.execute(
+            "SELECT rotas FROM solucoes WHERE instancia = ? AND metodo = ? AND config = ? "
+            "AND semente = ? AND versao = ?", (instancia, metodo, config, semente, versao)).fetchone()
+        return decodificar_solucao(linha[0]) if linha else None
+
+    def linhas(self, versao=None):
+        """
+        Itera as linhas gravadas como dicionários (opcionalmente de uma versão),
+        com as colunas do perfil da mesma execução, quando houver (o tempo da
+        execução com perfil vem como "tempo_perfil").
+        """
+        consulta = ("SELECT r.*, p.tempo AS tempo_perfil, p.perfil FROM resultados r "
+                    "LEFT JOIN perfis p USING (instancia, metodo, config, semente, versao)")
+        parametros = ()
+        if versao is not None:
+            consulta += " WHERE r.versao = ?"
+            parametros = (versao,)
+        cursor = self.conexao.execute(consulta, parametros)
+        colunas = [c[0] for c in cursor.description]
+        for linha in cursor:
+            linha = dict(zip(colunas, linha))
+            perfil = linha.pop("perfil")
+            if perfil is None:
+                del linha["tempo_perfil"]
+            else:
+                linha.update(json.loads(perfil))
+            yield linha
@@ -0,0 +1,200 @@
+
+# benchmark.py
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import timeit
+import numpy as np
+from gerador import gerar_arquivo
+from parser import ler_instancia_cvrp
+from heuristics.savings import savings_heuristica
+from heuristics import HEURISTICAS
+from main import PASTA_INSTANCIAS
+from metaheuristics.rvnd import GERADORES, rvnd
+from solucao import Solucao
+from utils import (
+    calcular_distancia,
+    calcular_custo_total,
+    calcular_vizinhos_proximos,
+    matriz_distancias_lista,
+    solucao_valida
+)
+
+# Escada de tamanhos (nº de clientes) das instâncias geradas dos macro-benchmarks
+TAMANHOS = [100, 250, 500, 1000, 2000, 5000]
+TAMANHOS_RAPIDOS = [100, 250, 500, 1000]
+SEMENTE = 1
+ARQUIVO_BASE = os.path.join("resultados", "benchmark_base.json")
+LIMIAR = 0.25        # falha se ficar mais de 25% mais lento que a base
+REPETICOES = 5       # micro: melhor de REPETICOES medições (cada uma com >= 0,2 s)
+K_VIZINHOS = 30      # lista de candidatos das vizinhanças granulares
+# Parâmetros do gerador (gerador.py) para as instâncias da escada
+PARAMETROS_GERADOR = {"deposito": "R", "clientes": "RC", "demandas": "1-100", "tamanho_rota": 10}
+MICRO = ("calcular_distancia", "calcular_custo_total", "solucao_valida", "solucao",
+         "rvnd") + tuple(f"vizinhanca_{nome}" for nome in GERADORES)
+
+def medir_micro(funcao, repeticoes=REPETICOES):
+    """Segundos por chamada: melhor de `repeticoes` medições (como no timeit)."""
+    temporizador = timeit.Timer(funcao)
+    numero, _ = temporizador.autorange()
+    return min(temporizador.repeat(repeat=repeticoes, number=numero)) / numero
+
+def medir_macro(funcao, repeticoes):
+    """Segundos por execução: melhor de `repeticoes` execuções."""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+def micro_benchmarks(dados, rotulo, filtro=""):
+    """
+    Funções básicas sobre a solução do Savings da instância (solução
+    determinística e com rotas de tamanho realista para as vizinhanças).
+    - filtro: só mede os benchmarks cujo nome contém o texto
+    """
+    rotas = savings_heuristica(dados)
+    solucao = Solucao(rotas, dados)
+    candidatos = calcular_vizinhos_proximos(dados, K_VIZINHOS)
+    distancias = dados['distancias']
+    matriz_distancias_lista(dados)
+    rng = random.Random(SEMENTE)
+    pares = [(rng.randint(1, dados['n_clientes']), rng.randint(1, dados['n_clientes']))
+             for _ in range(1000)]
+
+    def distancias_pares():
+        for i, j in pares:
+            calcular_distancia(i, j, distancias)
+
+    def percorrer(gerador):
+        # Todos os movimentos da vizinhança granular, a partir de cada cliente
+        def funcao():
+            for c in solucao.posicoes:
+                for _ in gerador(solucao, c, candidatos):
+                    pass
+        return funcao
+
+    casos = {
+        # por consulta (média sobre os 1000 pares)
+        "calcular_distancia": (distancias_pares, len(pares)),
+        "calcular_custo_total": (lambda: calcular_custo_total(rotas, dados), 1),
+        "solucao_valida": (lambda: solucao_valida(rotas, dados), 1),
+        "solucao": (lambda: Solucao(rotas, dados), 1),
+        # RVND completa a partir do Savings, com semente fixa (inclui montar a Solucao)
+        "rvnd": (lambda: rvnd(Solucao(rotas, dados), candidatos, rng=random.Random(SEMENTE)), 1),
+    }
+    for nome, gerador in GERADORES.items():
+        casos[f"vizinhanca_{nome}"] = (percorrer(gerador), 1)
+    for nome, (funcao, chamadas) in casos.items():
+        nome = f"micro/{nome}/{rotulo}"
+        if filtro in nome:
+            yield nome, medir_micro(funcao) / chamadas
+
+def macro_benchmarks(tamanhos, filtro=""):
+    """
+    Cada heurística construtiva em cada instância da escada, gerada com
+    semente fixa em uma pasta temporária e lida pelo parser.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        yield from _macro_benchmarks(tamanhos, filtro, pasta)
+
+def _macro_benchmarks(tamanhos, filtro, pasta):
+    for n_clientes in tamanhos:
+        nomes = {h: f"macro/{h}/n{n_clientes}" for h in HEURISTICAS}
+        if not any(filtro in nome for nome in nomes.values()):
+            continue
+        caminho = gerar_arquivo(pasta, n_clientes, semente=SEMENTE, **PARAMETROS_GERADOR)
+        dados = ler_instancia_cvrp(caminho, usar_cache=False)
+        # Caches da instância fora da medição (a matriz não é parte da heurística)
+        dados['distancias']
+        matriz_distancias_lista(dados)
+        repeticoes = 3 if n_clientes <= 1000 else 1
+        for heuristica, funcao in HEURISTICAS.items():
+            if filtro in nomes[heuristica]:
+                yield nomes[heuristica], medir_macro(lambda: funcao(dados), repeticoes)
+
+def ambiente():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "maquina": platform.machine(),
+        "processador": platform.processor(),
+        "sistema": platform.platform(),
+    }
+
+def comparar(resultados, base, limiar=LIMIAR):
+    """
+    Compara com a base. Retorna a lista de (nome, base, atual, razão) que
+    ficaram mais lentos que base * (1 + limiar).
+    """
+    regressoes = []
+    for nome, atual in resultados.items():
+        anterior = base.get(nome)
+        if anterior is None or anterior <= 0:
+            continue
+        razao = atual / anterior
+        if razao > 1 + limiar:
+            regressoes.append((nome, anterior, atual, razao))
+    return regressoes
+
+def executar(argumentos=None):
+    leitor = argparse.ArgumentParser(
+        description="Micro e macro-benchmarks com comparação contra a base gravada.")
+    leitor.add_argument("--base", default=ARQUIVO_BASE, help="arquivo JSON da base")
+    leitor.add_argument("--gravar-base", action="store_true",
+                        help="grava os resultados como nova base em vez de comparar")
+    leitor.add_argument("--limiar", type=float, default=LIMIAR,
+                        help="aumento relativo tolerado antes de falhar (0.25 = 25%%)")
+    leitor.add_argument("--rapido", action="store_true",
+                        help=f"macro-benchmarks só até {TAMANHOS_RAPIDOS[-1]} clientes")
+    leitor.add_argument("--filtro", default="", help="roda só benchmarks cujo nome contém o texto")
+    args = leitor.parse_args(argumentos)
+
+    resultados = {}
+
+    def registrar(medicoes):
+        for nome, segundos in medicoes:
+            print(f"  {nome:<55} {segundos * 1e3:12.4f} ms", flush=True)
+            resultados[nome] = segundos
+
+    arquivos = sorted(f for f in os.listdir(PASTA_INSTANCIAS)
+                      if f.endswith(".vrp") or f.endswith(".txt"))
+    for arquivo in arquivos:
+        if any(args.filtro in f"micro/{nome}/{arquivo}" for nome in MICRO):
+            dados = ler_instancia_cvrp(os.path.join(PASTA_INSTANCIAS, arquivo))
+            registrar(micro_benchmarks(dados, arquivo, args.filtro))
+    registrar(macro_benchmarks(TAMANHOS_RAPIDOS if args.rapido else TAMANHOS, args.filtro))
+
+    if args.gravar_base:
+        pasta = os.path.dirname(args.base)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        with open(args.base, "w") as f:
+            json.dump({"ambiente": ambiente(), "resultados": resultados}, f, indent=2, sort_keys=True)
+        print(f"Base gravada em {args.base} ({len(resultados)} benchmarks)")
+        return 0
+    if not os.path.exists(args.base):
+        print(f"Sem base em {args.base}; use --gravar-base para criá-la")
+        return 0
+    with open(args.base) as f:
+        base = json.load(f)
+    if base.get("ambiente") != ambiente():
+        print("Aviso: a base foi gravada em outro ambiente; as comparações podem não ser válidas")
+    regressoes = comparar(resultados, base["resultados"], args.limiar)
+    for nome, anterior, atual, razao in regressoes:
+        print(f"REGRESSÃO {nome}: {anterior * 1e3:.4f} ms -> {atual * 1e3:.4f} ms ({razao:.2f}x)")
+    if regressoes:
+        print(f"{len(regressoes)} benchmarks mais lentos que a base além de {args.limiar:.0%}")
+        return 1
+    print(f"Nenhuma regressão além de {args.limiar:.0%} ({len(resultados)} benchmarks)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(executar())
@@ -0,0 +1,39 @@
+
+# codificacao.py
+
+import struct
+import zlib
+import numpy as np
+
+# Formato: cabeçalho (versão, tipo dos ids, nº de rotas) + tamanhos das rotas +
+# rota gigante (clientes concatenados), tudo comprimido com zlib
+VERSAO_FORMATO = 1
+CABECALHO = struct.Struct("<BBI")
+TIPOS = {1: np.uint16, 2: np.uint32, 3: np.uint64}
+
+def codificar_solucao(rotas):
+    """
+    Codifica a solução (lista de rotas) em bytes compactos: a rota gigante como
+    array de inteiros e o tamanho de cada rota como delimitador.
+    """
+    tamanhos = np.fromiter((len(r) for r in rotas), dtype=np.uint32, count=len(rotas))
+    clientes = np.fromiter((c for r in rotas for c in r), dtype=np.int64, count=int(tamanhos.sum()))
+    maior = int(clientes.max()) if clientes.size else 0
+    tipo = 1 if maior < 2 ** 16 else 2 if maior < 2 ** 32 else 3
+    corpo = (CABECALHO.pack(VERSAO_FORMATO, tipo, len(rotas)) + tamanhos.tobytes() +
+             clientes.astype(TIPOS[tipo]).tobytes())
+    return zlib.compress(corpo, 6)
+
+def decodificar_solucao(dados):
+    """
+    Reconstrói a lista de rotas a partir dos bytes de codificar_solucao.
+    """
+    corpo = zlib.decompress(dados)
+    versao, tipo, n_rotas = CABECALHO.unpack_from(corpo)
+    if versao != VERSAO_FORMATO:
+        raise ValueError(f"Versão de codificação de solução desconhecida: {versao}")
+    inicio = CABECALHO.size
+    tamanhos = np.frombuffer(corpo, dtype=np.uint32, count=n_rotas, offset=inicio)
+    clientes = np.frombuffer(corpo, dtype=TIPOS[tipo], offset=inicio + 4 * n_rotas)
+    cortes = np.cumsum(tamanhos)[:-1]
+    return [rota.tolist() for rota in np.split(clientes.astype(np.int64), cortes)] if n_rotas else []
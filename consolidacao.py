@@ -0,0 +1,184 @@
+
+# consolidacao.py
+
+import glob
+import json
+import os
+import sqlite3
+import pandas as pd
+from armazenamento import versao_codigo
+
+# Colunas leves usadas nos resumos (nunca a solução)
+COLUNAS = ["Instancia", "Metodo", "Config", "Semente", "Versao", "Custo", "Tempo (s)",
+           "Qtd Rotas", "Qtd Veiculos", "Intensificacao", "Diversificacao"]
+COLUNAS_SQL = ", ".join(f'"{c}"' for c in COLUNAS)
+COLUNAS_CSV = ["Instancia", "Metodo", "Custo", "Tempo (s)", "Qtd Rotas", "Qtd Veiculos",
+               "Intensificacao", "Diversificacao"]
+TOLERANCIA_ALVO = 0.05  # alvo do time-to-target: referência * (1 + tolerância)
+VERSAO_LEGADA = "legado"  # versão das linhas dos CSVs antigos (anteriores ao armazém)
+
+def abrir_estado(caminho):
+    """
+    Estado incremental da consolidação: as colunas leves de todas as linhas já
+    incorporadas (chaveadas pela origem) e as marcas de até onde cada fonte foi lida.
+    """
+    conexao = sqlite3.connect(caminho)
+    # Estados gravados antes da coluna Versao são descartados e refeitos a
+    # partir das fontes (o estado é só um cache das linhas de resultado)
+    colunas = {c[1] for c in conexao.execute("PRAGMA table_info(linhas)")}
+    if colunas and "Versao" not in colunas:
+        conexao.execute("DROP TABLE linhas")
+        conexao.execute("DROP TABLE IF EXISTS marcas")
+    conexao.execute(f"""
+        CREATE TABLE IF NOT EXISTS linhas (
+            origem TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            {COLUNAS_SQL},
+            PRIMARY KEY (origem, chave)
+        )""")
+    conexao.execute("CREATE TABLE IF NOT EXISTS marcas (origem TEXT PRIMARY KEY, posicao INTEGER)")
+    return conexao
+
+def _marca(conexao, origem):
+    linha = conexao.execute("SELECT posicao FROM marcas WHERE origem = ?", (origem,)).fetchone()
+    return linha[0] if linha else 0
+
+def _incorporar(conexao, origem, chaves, tabela, posicao):
+    tabela = tabela.reindex(columns=COLUNAS)
+    registros = [(origem, chave) + tuple(None if pd.isna(v) else v for v in valores)
+                 for chave, valores in zip(chaves, tabela.itertuples(index=False, name=None))]
+    conexao.executemany(f"INSERT OR REPLACE INTO linhas VALUES ({', '.join('?' * (len(COLUNAS) + 2))})",
+                        registros)
+    conexao.execute("INSERT OR REPLACE INTO marcas VALUES (?, ?)", (origem, posicao))
+
+def ingerir_csvs(conexao, pasta_resultados):
+    """
+    Incorpora as linhas novas dos CSVs por instância (formato antigo, só
+    acrescentados): cada arquivo é lido a partir da última linha incorporada,
+    sem a coluna Solucao.
+    """
+    novas = 0
+    for arquivo in sorted(glob.glob(os.path.join(pasta_resultados, "resultados_*.csv"))):
+        origem = "csv:" + os.path.basename(arquivo)
+        lidas = _marca(conexao, origem)
+        tabela = pd.read_csv(arquivo, usecols=COLUNAS_CSV, skiprows=range(1, lidas + 1))
+        if tabela.empty:
+            continue
+        tabela["Config"] = ""
+        tabela["Semente"] = 0
+        tabela["Versao"] = VERSAO_LEGADA
+        chaves = [str(lidas + i) for i in range(len(tabela))]
+        _incorporar(conexao, origem, chaves, tabela, lidas + len(tabela))
+        novas += len(tabela)
+    return novas
+
+def ingerir_armazem(conexao, arquivo_resultados):
+    """
+    Incorpora as linhas do armazém SQLite com rowid acima da última marca
+    (regravações recebem rowid novo e substituem a linha pela chave).
+    """
+    if not os.path.exists(arquivo_resultados):
+        return 0
+    origem = "db:" + os.path.basename(arquivo_resultados)
+    ultima = _marca(conexao, origem)
+    with sqlite3.connect(arquivo_resultados) as fonte:
+        tabela = pd.read_sql_query(
+            'SELECT rowid, instancia AS "Instancia", metodo AS "Metodo", config AS "Config", '
+            'semente AS "Semente", versao AS "Versao", custo AS "Custo", tempo AS "Tempo (s)", '
+            'qtd_rotas AS "Qtd Rotas", qtd_veiculos AS "Qtd Veiculos", '
+            'intensificacao AS "Intensificacao", diversificacao AS "Diversificacao" '
+            'FROM resultados WHERE rowid > ? ORDER BY rowid', fonte, params=(ultima,))
+    if tabela.empty:
+        return 0
+    chaves = tabela[["Instancia", "Metodo", "Config", "Semente", "Versao"]].astype(str).agg("|".join, axis=1)
+    _incorporar(conexao, origem, chaves, tabela, int(tabela["rowid"].max()))
+    return len(tabela)
+
+def calcular_tabelas(dados, referencias=None, tolerancia_alvo=TOLERANCIA_ALVO):
+    """
+    Calcula os resumos a partir das colunas leves das execuções dadas (de uma
+    mesma versão do código: ver consolidar).
+    - referencias: dict instância -> melhor custo conhecido; instâncias sem
+      referência usam o menor custo encontrado entre todas as execuções
+    Retorna dict nome_do_arquivo -> DataFrame.
+    """
+    dados = dados.copy()
+    dados["Custo"] = pd.to_numeric(dados["Custo"], errors="coerce")
+    dados["Tempo (s)"] = pd.to_numeric(dados["Tempo (s)"], errors="coerce")
+    dados["Qtd Veiculos"] = pd.to_numeric(dados["Qtd Veiculos"], errors="coerce")
+
+    por_instancia = dados.groupby("Instancia")["Custo"]
+    melhor_encontrado = por_instancia.transform("min")
+    referencia = dados["Instancia"].map(referencias or {}).astype(float).fillna(melhor_encontrado)
+    dados["Ranking"] = por_instancia.rank(method="dense")
+    dados["Gap (%)"] = 100.0 * (dados["Custo"] - referencia) / referencia
+    atingiu = dados["Custo"] <= referencia * (1 + tolerancia_alvo)
+    dados["Tempo ate alvo (s)"] = dados["Tempo (s)"].where(atingiu)
+    dados["Atingiu alvo"] = atingiu.astype(float)
+
+    por_metodo = dados.groupby("Metodo").agg({
+        "Custo": "mean", "Tempo (s)": "mean", "Qtd Veiculos": "mean", "Ranking": "mean",
+        "Gap (%)": "mean", "Tempo ate alvo (s)": "mean", "Atingiu alvo": "mean",
+    })
+
+    def coluna(nome):
+        return por_metodo[nome].sort_values().to_frame()
+
+    menor_custo = dados.loc[por_instancia.idxmin(), COLUNAS_CSV]
+    menor_veiculos = dados.loc[dados.groupby("Instancia")["Qtd Veiculos"].idxmin(),
+                               ["Instancia", "Metodo", "Qtd Veiculos"]]
+    por_semente = dados.groupby(["Instancia", "Metodo", "Config"])["Custo"].agg(
+        ["count", "mean", "std", "var", "min", "max"]).reset_index()
+    tempo_alvo = por_metodo[["Tempo ate alvo (s)", "Atingiu alvo"]].sort_values("Tempo ate alvo (s)")
+    return {
+        "menor_custo_por_instancia.csv": menor_custo,
+        "menor_veiculos_por_instancia.csv": menor_veiculos,
+        "ranking_medio_por_metodo.csv": coluna("Ranking"),
+        "custo_medio_por_metodo.csv": coluna("Custo"),
+        "tempo_medio_por_metodo.csv": coluna("Tempo (s)"),
+        "veiculos_medio_por_metodo.csv": coluna("Qtd Veiculos"),
+        "gap_medio_por_metodo.csv": coluna("Gap (%)"),
+        "variancia_por_semente.csv": por_semente,
+        "tempo_ate_alvo_por_metodo.csv": tempo_alvo,
+    }
+
+def consolidar(pasta_resultados="resultados", arquivo_resultados=None, arquivo_referencias=None,
+               tolerancia_alvo=TOLERANCIA_ALVO, versao=None):
+    """
+    Incorpora ao estado apenas as linhas de resultado novas (CSVs antigos e
+    armazém SQLite) e regrava as tabelas de resumo em pasta_resultados.
+    As tabelas usam só as execuções de uma versão do código; as linhas dos
+    CSVs antigos geram tabelas à parte, com o prefixo "legado_", e as de
+    versões superadas são ignoradas. Sem execuções da versão consolidada, as
+    tabelas sem prefixo não são regravadas (os resumos existentes ficam).
+    - arquivo_referencias: JSON {instância: melhor custo conhecido}, opcional
+    - versao: versão do código consolidada; se None, a atual (versao_codigo)
+    """
+    versao = versao or versao_codigo()
+    arquivo_resultados = arquivo_resultados or os.path.join(pasta_resultados, "resultados.db")
+    conexao = abrir_estado(os.path.join(pasta_resultados, "consolidacao.db"))
+    with conexao:
+        novas = ingerir_csvs(conexao, pasta_resultados) + ingerir_armazem(conexao, arquivo_resultados)
+    dados = pd.read_sql_query(f"SELECT {COLUNAS_SQL} FROM linhas", conexao)
+    conexao.close()
+    referencias = None
+    if arquivo_referencias and os.path.exists(arquivo_referencias):
+        with open(arquivo_referencias) as f:
+            referencias = json.load(f)
+    tabelas = {}
+    atuais = dados[dados["Versao"] == versao]
+    if not atuais.empty:
+        tabelas.update(calcular_tabelas(atuais, referencias, tolerancia_alvo))
+    legado = dados[dados["Versao"] == VERSAO_LEGADA]
+    if not legado.empty:
+        for nome, tabela in calcular_tabelas(legado, referencias, tolerancia_alvo).items():
+            tabelas["legado_" + nome] = tabela
+    for nome, tabela in tabelas.items():
+        tabela.to_csv(os.path.join(pasta_resultados, nome), index=tabela.index.name == "Metodo")
+    print(f"{novas} linhas novas incorporadas ({len(dados)} no total, "
+          f"{len(atuais)} da versão {versao}); "
+          f"{len(tabelas)} tabelas gravadas em {pasta_resultados}")
+    return tabelas
+
+if __name__ == "__main__":
+    consolidar()
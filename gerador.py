@@ -0,0 +1,205 @@
+
+# gerador.py
+
+import argparse
+import math
+import os
+import numpy as np
+
+# Gerador de instâncias no estilo do conjunto X (Uchoa et al., 2017):
+# posição do depósito, posição dos clientes, distribuição das demandas e
+# tamanho médio das rotas, numa grade inteira [0, lado]².
+
+LADO = 1000                 # grade do conjunto X
+DECAIMENTO = 40             # atração dos clusters: exp(-d / DECAIMENTO), para LADO = 1000
+CLIENTES_POR_GRADE = 10000  # acima disso a grade cresce para manter a densidade
+
+POSICOES_DEPOSITO = {
+    "C": "central",
+    "E": "excêntrico (canto)",
+    "R": "aleatório",
+}
+POSICOES_CLIENTES = {
+    "R": "aleatórios",
+    "C": "agrupados",
+    "RC": "metade aleatórios, metade agrupados",
+}
+DISTRIBUICOES_DEMANDA = {
+    "U": "unitárias",
+    "1-10": "pequenas, variância alta",
+    "5-10": "pequenas, variância baixa",
+    "1-100": "grandes, variância alta",
+    "50-100": "grandes, variância baixa",
+    "Q": "dependentes do quadrante",
+    "SL": "muitas pequenas, poucas grandes",
+}
+
+def lado_grade(n_clientes):
+    """Lado da grade: 1000 como no conjunto X, crescendo com sqrt(n) acima de 10 mil clientes."""
+    if n_clientes <= CLIENTES_POR_GRADE:
+        return LADO
+    return int(math.ceil(LADO * math.sqrt(n_clientes / CLIENTES_POR_GRADE)))
+
+def _pontos_aleatorios(rng, quantidade, lado):
+    return rng.integers(0, lado + 1, (quantidade, 2))
+
+def _pontos_agrupados(rng, quantidade, centros, lado):
+    """
+    Amostragem por rejeição: um ponto uniforme da grade é aceito com
+    probabilidade sum_s exp(-d(s, ponto) / decaimento) sobre os centros s.
+    """
+    decaimento = DECAIMENTO * lado / LADO
+    # Fração esperada de aceitação (massa dos clusters sobre a área da grade)
+    aceitacao = min(1.0, len(centros) * 2 * math.pi * decaimento ** 2 / (lado + 1) ** 2)
+    aceitos = []
+    faltam = quantidade
+    while faltam > 0:
+        lote = _pontos_aleatorios(rng, max(1024, int(1.5 * faltam / aceitacao)), lado)
+        dx = lote[:, 0, None] - centros[None, :, 0]
+        dy = lote[:, 1, None] - centros[None, :, 1]
+        atracao = np.exp(-np.sqrt(dx * dx + dy * dy) / decaimento).sum(axis=1)
+        lote = lote[rng.random(len(lote)) < atracao][:faltam]
+        aceitos.append(lote)
+        faltam -= len(lote)
+    return np.concatenate(aceitos) if aceitos else np.empty((0, 2), dtype=np.int64)
+
+def posicionar_clientes(rng, n_clientes, modo, lado, deposito):
+    """
+    Coordenadas inteiras dos clientes, sem repetição (nem com o depósito).
+    - modo: "R", "C" ou "RC"; nos modos agrupados, de 3 a 8 clientes sorteados
+      uniformemente servem de centros dos clusters
+    """
+    if modo not in POSICOES_CLIENTES:
+        raise ValueError(f"Posição de clientes desconhecida: {modo}")
+    n_centros = int(rng.integers(3, 9)) if modo != "R" else 0
+    n_centros = min(n_centros, n_clientes)
+    centros = _pontos_aleatorios(rng, n_centros, lado)
+    n_agrupados = {"R": 0, "C": n_clientes, "RC": n_clientes // 2}[modo] - n_centros
+    n_agrupados = max(n_agrupados, 0)
+
+    def gerar(agrupados, aleatorios):
+        return np.concatenate([_pontos_agrupados(rng, agrupados, centros, lado),
+                               _pontos_aleatorios(rng, aleatorios, lado)])
+
+    clientes = np.concatenate([centros, gerar(n_agrupados, n_clientes - n_centros - n_agrupados)])
+    # Regera, com o mesmo processo, os pontos que repetem outro já existente
+    agrupado = np.zeros(n_clientes, dtype=bool)
+    agrupado[n_centros:n_centros + n_agrupados] = True
+    while True:
+        codigos = np.concatenate([[deposito[0] * (lado + 1) + deposito[1]],
+                                  clientes[:, 0] * (lado + 1) + clientes[:, 1]])
+        _, primeiros = np.unique(codigos, return_index=True)
+        repetidos = np.setdiff1d(np.arange(1, len(codigos)), primeiros) - 1
+        if repetidos.size == 0:
+            return clientes
+        n_rep_agrupados = int(agrupado[repetidos].sum())
+        novos = gerar(n_rep_agrupados, repetidos.size - n_rep_agrupados)
+        clientes[np.concatenate([repetidos[agrupado[repetidos]], repetidos[~agrupado[repetidos]]])] = novos
+
+def sortear_demandas(rng, n_clientes, distribuicao, clientes, lado):
+    if distribuicao == "U":
+        return np.ones(n_clientes, dtype=np.int64)
+    if distribuicao in ("1-10", "5-10", "1-100", "50-100"):
+        minimo, maximo = map(int, distribuicao.split("-"))
+        return rng.integers(minimo, maximo + 1, n_clientes)
+    if distribuicao == "Q":
+        # Quadrantes pares (inferior esquerdo e superior direito): [51, 100]; ímpares: [1, 50]
+        meio = lado / 2
+        par = (clientes[:, 0] < meio) == (clientes[:, 1] < meio)
+        return np.where(par, rng.integers(51, 101, n_clientes), rng.integers(1, 51, n_clientes))
+    if distribuicao == "SL":
+        # De 70% a 95% das demandas em [1, 10]; as demais em [50, 100]
+        fracao = rng.uniform(0.7, 0.95)
+        pequenas = rng.random(n_clientes) < fracao
+        return np.where(pequenas, rng.integers(1, 11, n_clientes), rng.integers(50, 101, n_clientes))
+    raise ValueError(f"Distribuição de demanda desconhecida: {distribuicao}")
+
+def gerar_instancia_x(n_clientes, deposito="R", clientes="RC", demandas="1-100",
+                      tamanho_rota=None, semente=0):
+    """
+    Gera uma instância CVRP no estilo do conjunto X.
+    - deposito: "C" (centro), "E" (canto (0, 0)) ou "R" (aleatório)
+    - clientes: "R", "C" ou "RC" (ver POSICOES_CLIENTES)
+    - demandas: uma das chaves de DISTRIBUICOES_DEMANDA
+    - tamanho_rota: nº médio de clientes por rota; se None, sorteado da
+      distribuição triangular em [3, 25] com moda 6. A capacidade é
+      ceil(tamanho_rota * soma das demandas / n_clientes)
+    - semente: semente do gerador (mesma semente e parâmetros, mesma instância)
+    Retorna dict com nome, coordenadas (n_clientes + 1, 2; linha 0 é o
+    depósito), demandas (idem, 0 no depósito) e capacidade.
+    """
+    if deposito not in POSICOES_DEPOSITO:
+        raise ValueError(f"Posição de depósito desconhecida: {deposito}")
+    rng = np.random.default_rng(semente)
+    lado = lado_grade(n_clientes)
+    if deposito == "C":
+        posicao_deposito = np.array([lado // 2, lado // 2])
+    elif deposito == "E":
+        posicao_deposito = np.array([0, 0])
+    else:
+        posicao_deposito = _pontos_aleatorios(rng, 1, lado)[0]
+    coordenadas = posicionar_clientes(rng, n_clientes, clientes, lado, posicao_deposito)
+    q = sortear_demandas(rng, n_clientes, demandas, coordenadas, lado)
+    if tamanho_rota is None:
+        tamanho_rota = rng.triangular(3, 6, 25)
+    capacidade = int(math.ceil(tamanho_rota * q.sum() / n_clientes))
+    capacidade = max(capacidade, int(q.max()))
+    k = int(math.ceil(q.sum() / capacidade))
+    return {
+        "nome": f"X-n{n_clientes + 1}-k{k}",
+        "comentario": (f"Gerada no estilo do conjunto X (Uchoa et al., 2017): deposito={deposito} "
+                       f"clientes={clientes} demandas={demandas} "
+                       f"tamanho_rota={tamanho_rota:.2f} semente={semente}"),
+        "coordenadas": np.vstack([posicao_deposito, coordenadas]).astype(np.int64),
+        "demandas": np.concatenate([[0], q]).astype(np.int64),
+        "capacidade": capacidade,
+    }
+
+def escrever_cvrplib(caminho, instancia):
+    """
+    Grava a instância no formato CVRPLIB (EUC_2D), com o depósito como nó 1
+    e os clientes como nós 2..n+1, como nas instâncias X.
+    """
+    coordenadas = instancia["coordenadas"]
+    n_nos = len(coordenadas)
+    ids = range(1, n_nos + 1)
+    linhas = [
+        f"NAME : \t{instancia['nome']}",
+        f"COMMENT : \t\"{instancia['comentario']}\"",
+        "TYPE : \tCVRP",
+        f"DIMENSION : \t{n_nos}",
+        "EDGE_WEIGHT_TYPE : \tEUC_2D",
+        f"CAPACITY : \t{instancia['capacidade']}",
+        "NODE_COORD_SECTION",
+    ]
+    linhas += [f"{i}\t{x}\t{y}" for i, (x, y) in zip(ids, coordenadas.tolist())]
+    linhas.append("DEMAND_SECTION")
+    linhas += [f"{i}\t{q}" for i, q in zip(ids, instancia["demandas"].tolist())]
+    linhas += ["DEPOT_SECTION", "1", "-1", "EOF", ""]
+    pasta = os.path.dirname(caminho)
+    if pasta and not os.path.exists(pasta):
+        os.makedirs(pasta)
+    with open(caminho, "w") as f:
+        f.write("\n".join(linhas))
+
+def gerar_arquivo(pasta, n_clientes, semente=0, **parametros):
+    """Gera a instância e grava em pasta/<nome>-s<semente>.vrp. Retorna o caminho."""
+    instancia = gerar_instancia_x(n_clientes, semente=semente, **parametros)
+    caminho = os.path.join(pasta, f"{instancia['nome']}-s{semente}.vrp")
+    escrever_cvrplib(caminho, instancia)
+    return caminho
+
+if __name__ == "__main__":
+    leitor = argparse.ArgumentParser(description="Gera instâncias CVRP no estilo do conjunto X.")
+    leitor.add_argument("n_clientes", type=int, nargs="+")
+    leitor.add_argument("--pasta", default="instances")
+    leitor.add_argument("--deposito", choices=POSICOES_DEPOSITO, default="R")
+    leitor.add_argument("--clientes", choices=POSICOES_CLIENTES, default="RC")
+    leitor.add_argument("--demandas", choices=DISTRIBUICOES_DEMANDA, default="1-100")
+    leitor.add_argument("--tamanho-rota", type=float, default=None)
+    leitor.add_argument("--semente", type=int, default=0)
+    args = leitor.parse_args()
+    for n in args.n_clientes:
+        print(gerar_arquivo(args.pasta, n, semente=args.semente, deposito=args.deposito,
+                            clientes=args.clientes, demandas=args.demandas,
+                            tamanho_rota=args.tamanho_rota))
@@ -0,0 +1,13 @@
+
+# heuristics/__init__.py
+
+from heuristics.savings import savings_heuristica
+from heuristics.insertion import insertion_heuristica
+from heuristics.route_first import route_first_cluster_second
+
+# Heurísticas construtivas: nome -> função(dados)
+HEURISTICAS = {
+    "Savings": savings_heuristica,
+    "Insertion": insertion_heuristica,
+    "RouteFirstClusterSecond": route_first_cluster_second
+}
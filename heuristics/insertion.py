@@ -1,65 +1,161 @@
 
 # heuristics/insertion.py
 
-from utils import calcular_distancia, solucao_valida
+import numpy as np
+from indice_espacial import IndiceEspacial
+from perfil import PERFIL_INATIVO
+from utils import (
+    calcular_distancia,
+    gerar_solucao_inicial,
+    ids_clientes,
+    solucao_valida,
+    vetor_demandas_por_id
+)
 
-def insertion_heuristica(dados):
+def insertion_heuristica(dados, perfil=PERFIL_INATIVO):
     """
     Heurística de inserção sequencial para o CVRP.
+    Para cada cliente não atendido, mantém em cache o menor custo de inserção
+    na rota em construção e a posição correspondente; após cada inserção só são
+    avaliadas as duas arestas novas (e recalculados os clientes cuja melhor
+    aresta foi desfeita).
+    - perfil: Perfil (perfil.py) opcional; fases semente, insercao e validacao
     Retorna lista de rotas (cada rota é uma lista de índices de clientes).
     """
+    distancias = dados['distancias']
     coordenadas = dados['coordenadas']
     demandas = dados['demandas']
     capacidade = dados['capacidade']
-    n_clientes = dados['n_clientes']
     deposito = dados['deposito']
 
-    clientes = set(range(1, n_clientes + 1))
+    clientes = set(ids_clientes(dados))
+    n_ids = max(clientes, default=0) + 1
+    vetor_demandas = vetor_demandas_por_id(dados)[:n_ids]
     rotas = []
     clientes_nao_atendidos = clientes.copy()
+    # Índice espacial dos clientes não atendidos, para escolher a semente de cada
+    # rota; nas instâncias EXPLICIT (as coordenadas, se houver, são só de
+    # exibição), a semente vem da linha do depósito na matriz
+    indice = None
+    if coordenadas and dados.get('pesos') is None:
+        indice = IndiceEspacial(coordenadas, clientes, dados.get('arredondar', False))
+    # Máscara dos clientes não atendidos (índice = id do cliente)
+    ativos = np.zeros(n_ids, dtype=bool)
+    ativos[list(clientes)] = True
+    melhor_delta = np.full(n_ids, np.inf)
+    melhor_posicao = np.zeros(n_ids, dtype=np.int64)
 
     while clientes_nao_atendidos:
         rota = []
         carga = 0
-        # Seleciona cliente mais próximo do depósito para iniciar rota
-        cliente_inicial = min(clientes_nao_atendidos,
-                              key=lambda i: calcular_distancia(deposito, i, coordenadas))
+        with perfil.fase("semente"):
+            # Seleciona cliente mais próximo do depósito para iniciar rota
+            if indice is not None:
+                cliente_inicial = indice.mais_proximo(*coordenadas[deposito])
+                indice.remover(cliente_inicial)
+            else:
+                cliente_inicial = min(clientes_nao_atendidos,
+                                      key=lambda i: calcular_distancia(deposito, i, distancias))
+                perfil.contar("distancias", len(clientes_nao_atendidos))
         rota.append(cliente_inicial)
         carga += demandas[cliente_inicial]
         clientes_nao_atendidos.remove(cliente_inicial)
+        ativos[cliente_inicial] = False
+
+        with perfil.fase("insercao"):
+            # Custos de inserção de todos os clientes na rota recém-aberta
+            pendentes = np.flatnonzero(ativos)
+            melhor_delta[pendentes], melhor_posicao[pendentes] = melhores_insercoes(
+                distancias, rota, deposito, pendentes)
+            perfil.contar("distancias", 4 * len(pendentes) + 2)
 
-        while True:
-            # Busca cliente não atendido que pode ser inserido sem exceder capacidade
-            candidatos = [i for i in clientes_nao_atendidos if carga + demandas[i] <= capacidade]
-            if not candidatos:
-                break
-            # Insere o cliente que minimiza o aumento de custo na rota
-            melhor_cliente = None
-            melhor_custo = float('inf')
-            melhor_posicao = None
-            for cliente in candidatos:
-                for pos in range(len(rota) + 1):
-                    rota_temp = rota[:pos] + [cliente] + rota[pos:]
-                    custo = calcular_custo_rota([deposito] + rota_temp + [deposito], coordenadas)
-                    if custo < melhor_custo:
-                        melhor_custo = custo
-                        melhor_cliente = cliente
-                        melhor_posicao = pos
-            if melhor_cliente is not None:
-                rota.insert(melhor_posicao, melhor_cliente)
+            while True:
+                # Busca cliente não atendido que pode ser inserido sem exceder capacidade
+                perfil.contar("viabilidade", len(clientes_nao_atendidos))
+                candidatos = np.flatnonzero(ativos & (vetor_demandas <= capacidade - carga))
+                if candidatos.size == 0:
+                    break
+                # Insere o cliente que minimiza o aumento de custo na rota
+                # (empates: menor id de cliente, depois menor posição)
+                melhor_cliente = int(candidatos[np.argmin(melhor_delta[candidatos])])
+                melhor_pos = int(melhor_posicao[melhor_cliente])
+                anterior = rota[melhor_pos - 1] if melhor_pos > 0 else deposito
+                seguinte = rota[melhor_pos] if melhor_pos < len(rota) else deposito
+                rota.insert(melhor_pos, melhor_cliente)
                 carga += demandas[melhor_cliente]
                 clientes_nao_atendidos.remove(melhor_cliente)
-            else:
-                break
+                if indice is not None:
+                    indice.remover(melhor_cliente)
+                ativos[melhor_cliente] = False
+                avaliadas = atualizar_insercoes(
+                    distancias, rota, deposito, candidatos[candidatos != melhor_cliente],
+                    melhor_delta, melhor_posicao, melhor_pos, anterior, seguinte, melhor_cliente)
+                perfil.contar("distancias", avaliadas)
         rotas.append(rota)
-    # Verifica validade final
-    if not solucao_valida(rotas, dados):
-        # Se não for válida, retorna rotas individuais
-        rotas = [[i] for i in range(1, n_clientes + 1)]
+    if indice is not None:
+        perfil.contar("distancias", indice.avaliacoes)
+    with perfil.fase("validacao"):
+        perfil.contar("viabilidade")
+        # Verifica validade final
+        if not solucao_valida(rotas, dados):
+            # Se não for válida, retorna rotas individuais
+            rotas = gerar_solucao_inicial(dados)
     return rotas
 
-def calcular_custo_rota(rota, coordenadas):
+def melhores_insercoes(distancias, rota, deposito, clientes):
+    """
+    Avalia a inserção de cada cliente em todas as posições da rota.
+    Retorna (delta, posicao) com o menor aumento de custo de cada cliente
+    (empates resolvidos pela menor posição).
+    """
+    anteriores = np.array([deposito] + rota)
+    seguintes = np.array(rota + [deposito])
+    deltas = (distancias[np.ix_(clientes, anteriores)] + distancias[np.ix_(clientes, seguintes)] -
+              distancias[anteriores, seguintes])
+    posicoes = np.argmin(deltas, axis=1)
+    return deltas[np.arange(len(clientes)), posicoes], posicoes
+
+def atualizar_insercoes(distancias, rota, deposito, clientes, melhor_delta, melhor_posicao,
+                        pos, anterior, seguinte, inserido):
+    """
+    Atualiza o cache de inserção após inserir `inserido` na posição pos, entre
+    anterior e seguinte: a aresta (anterior, seguinte) deixa de existir e as
+    arestas (anterior, inserido) e (inserido, seguinte) passam a ser as posições
+    pos e pos + 1. Só os clientes cuja melhor posição era a aresta desfeita
+    precisam reavaliar a rota inteira.
+    Retorna o número de distâncias consultadas.
+    """
+    if clientes.size == 0:
+        return 0
+    posicoes = melhor_posicao[clientes]
+    desfeita = posicoes == pos
+    posicoes = np.where(posicoes > pos, posicoes + 1, posicoes)
+    deltas = melhor_delta[clientes]
+
+    d_anterior = (distancias[anterior, clientes] + distancias[clientes, inserido] -
+                  distancias[anterior, inserido])
+    d_seguinte = (distancias[inserido, clientes] + distancias[clientes, seguinte] -
+                  distancias[inserido, seguinte])
+    novo_delta = np.where(d_seguinte < d_anterior, d_seguinte, d_anterior)
+    nova_posicao = np.where(d_seguinte < d_anterior, pos + 1, pos)
+    # As novas posições vêm antes das antigas que foram deslocadas: em empate,
+    # prevalece a menor posição
+    substitui = np.where(posicoes > pos, novo_delta <= deltas, novo_delta < deltas)
+    deltas = np.where(substitui, novo_delta, deltas)
+    posicoes = np.where(substitui, nova_posicao, posicoes)
+
+    avaliadas = 4 * len(clientes) + 2
+    if desfeita.any():
+        recalcular = clientes[desfeita]
+        deltas[desfeita], posicoes[desfeita] = melhores_insercoes(
+            distancias, rota, deposito, recalcular)
+        avaliadas += (2 * len(recalcular) + 1) * (len(rota) + 1)
+    melhor_delta[clientes] = deltas
+    melhor_posicao[clientes] = posicoes
+    return avaliadas
+
+def calcular_custo_rota(rota, distancias):
     custo = 0.0
     for i in range(len(rota) - 1):
-        custo += calcular_distancia(rota[i], rota[i+1], coordenadas)
+        custo += calcular_distancia(rota[i], rota[i+1], distancias)
     return custo
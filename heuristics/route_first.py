@@ -1,31 +1,78 @@
 
 # heuristics/route_first.py
 
-from utils import calcular_distancia, solucao_valida
+from collections import deque
+from indice_espacial import IndiceEspacial
+from perfil import PERFIL_INATIVO
+from utils import gerar_solucao_inicial, ids_clientes, matriz_distancias_lista, solucao_valida
 
-def route_first_cluster_second(dados):
+def route_first_cluster_second(dados, modo_split="otimo", perfil=PERFIL_INATIVO):
     """
     Heurística route-first, cluster-second para o CVRP.
+    - modo_split: "otimo" (Split ótimo em O(n), Vidal 2016) ou "guloso"
+      (corta a rota gigante sempre que a capacidade seria excedida)
+    - perfil: Perfil (perfil.py) opcional; fases rota_gigante, split e validacao
     Retorna lista de rotas (cada rota é uma lista de índices de clientes).
     """
+    # Passo 1: Construir uma rota única (TSP) usando nearest neighbor
+    with perfil.fase("rota_gigante"):
+        rota_tsp = rota_gigante_vizinho_mais_proximo(dados, perfil)
+
+    # Passo 2: Dividir a rota TSP em rotas viáveis (cluster-second)
+    with perfil.fase("split"):
+        if modo_split == "otimo":
+            rotas = split_otimo(rota_tsp, dados, perfil)
+        elif modo_split == "guloso":
+            rotas = split_guloso(rota_tsp, dados, perfil)
+        else:
+            raise ValueError(f"Modo de split desconhecido: {modo_split}")
+
+    with perfil.fase("validacao"):
+        perfil.contar("viabilidade")
+        # Verifica validade final
+        if rotas is None or not solucao_valida(rotas, dados):
+            # Se não for válida, retorna rotas individuais
+            rotas = gerar_solucao_inicial(dados)
+    return rotas
+
+def rota_gigante_vizinho_mais_proximo(dados, perfil=PERFIL_INATIVO):
+    """
+    Rota gigante pelo vizinho mais próximo a partir do depósito. As consultas
+    usam o índice espacial; nas instâncias EXPLICIT (com ou sem coordenadas
+    de exibição), a matriz de pesos.
+    """
     coordenadas = dados['coordenadas']
-    demandas = dados['demandas']
-    capacidade = dados['capacidade']
-    n_clientes = dados['n_clientes']
+    clientes = ids_clientes(dados)
+    n_clientes = len(clientes)
     deposito = dados['deposito']
-
-    # Passo 1: Construir uma rota única (TSP) usando nearest neighbor
-    clientes = set(range(1, n_clientes + 1))
     rota_tsp = []
     atual = deposito
-    clientes_restantes = clientes.copy()
-    while clientes_restantes:
-        proximo = min(clientes_restantes, key=lambda i: calcular_distancia(atual, i, coordenadas))
+    if not coordenadas or dados.get('pesos') is not None:
+        distancias = matriz_distancias_lista(dados)
+        clientes_restantes = set(clientes)
+        while clientes_restantes:
+            proximo = min(clientes_restantes, key=distancias[atual].__getitem__)
+            rota_tsp.append(proximo)
+            clientes_restantes.remove(proximo)
+            atual = proximo
+        perfil.contar("distancias", n_clientes * (n_clientes + 1) // 2)
+        return rota_tsp
+    clientes_restantes = IndiceEspacial(coordenadas, clientes,
+                                        dados.get('arredondar', False))
+    while len(clientes_restantes):
+        proximo = clientes_restantes.mais_proximo(*coordenadas[atual])
         rota_tsp.append(proximo)
-        clientes_restantes.remove(proximo)
+        clientes_restantes.remover(proximo)
         atual = proximo
+    perfil.contar("distancias", clientes_restantes.avaliacoes)
+    return rota_tsp
 
-    # Passo 2: Dividir a rota TSP em rotas viáveis (cluster-second)
+def split_guloso(rota_tsp, dados, perfil=PERFIL_INATIVO):
+    """
+    Corta a rota gigante sempre que o próximo cliente excederia a capacidade.
+    """
+    demandas = dados['demandas']
+    capacidade = dados['capacidade']
     rotas = []
     carga = 0
     rota_atual = []
@@ -38,9 +85,72 @@ def route_first_cluster_second(dados):
         carga += demandas[cliente]
     if rota_atual:
         rotas.append(rota_atual)
+    perfil.contar("viabilidade", len(rota_tsp))
+    return rotas
+
+def split_otimo(rota_tsp, dados, perfil=PERFIL_INATIVO):
+    """
+    Split ótimo da rota gigante com frota ilimitada, em O(n) (Vidal, 2016).
+    Resolve o caminho mínimo no grafo auxiliar em que o arco (i, j) é a rota
+    que atende os clientes i+1..j, mantendo em uma deque apenas os
+    predecessores não dominados.
+    Retorna lista de rotas, ou None se algum cliente exceder a capacidade.
+    """
+    distancias = matriz_distancias_lista(dados)
+    demandas = dados['demandas']
+    capacidade = dados['capacidade']
+    deposito = dados['deposito']
+
+    n = len(rota_tsp)
+    if n == 0:
+        return []
+    # Índices 1..n sobre a rota gigante: t[k] é o k-ésimo cliente
+    t = [deposito] + rota_tsp
+    dist_deposito = distancias[deposito]
+    d0 = [dist_deposito[c] for c in t]
+    acumulada = [0.0] * (n + 1)   # distância de t[1] até t[k] ao longo da rota
+    carga = [0] * (n + 1)         # demanda acumulada de t[1..k]
+    for k in range(1, n + 1):
+        carga[k] = carga[k - 1] + demandas[t[k]]
+        if k > 1:
+            acumulada[k] = acumulada[k - 1] + distancias[t[k - 1]][t[k]]
 
-    # Verifica validade final
-    if not solucao_valida(rotas, dados):
-        # Se não for válida, retorna rotas individuais
-        rotas = [[i] for i in range(1, n_clientes + 1)]
+    perfil.contar("distancias", 2 * n)
+    checagens = 0
+
+    potencial = [0.0] * (n + 1)
+    predecessor = [0] * (n + 1)
+    # chave(i) = potencial[i] + d(0, t[i+1]) - acumulada[i+1]; custo de chegar em
+    # j partindo de i é chave(i) + acumulada[j] + d(t[j], 0)
+    chave = [0.0] * (n + 1)
+    chave[0] = d0[1]
+    fila = deque([0])
+    for j in range(1, n + 1):
+        if not fila:
+            return None
+        i = fila[0]
+        potencial[j] = chave[i] + acumulada[j] + d0[j]
+        predecessor[j] = i
+        if j < n:
+            chave[j] = potencial[j] + d0[j + 1] - acumulada[j + 1]
+            ultimo = fila[-1]
+            # j só entra se não for dominado pelo último (mesma carga e chave menor)
+            if not (carga[ultimo] == carga[j] and chave[ultimo] <= chave[j]):
+                while fila and chave[j] <= chave[fila[-1]]:
+                    fila.pop()
+                fila.append(j)
+            # Remove da frente predecessores que não comportam o cliente j+1
+            while fila and carga[j + 1] - carga[fila[0]] > capacidade:
+                fila.popleft()
+                checagens += 1
+            checagens += 1
+    perfil.contar("viabilidade", checagens)
+
+    rotas = []
+    j = n
+    while j > 0:
+        i = predecessor[j]
+        rotas.append(rota_tsp[i:j])
+        j = i
+    rotas.reverse()
     return rotas
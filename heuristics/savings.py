@@ -1,63 +1,106 @@
 
 # heuristics/savings.py
 
-from utils import calcular_distancia, solucao_valida
+import numpy as np
+from perfil import PERFIL_INATIVO
+from utils import gerar_solucao_inicial, ids_clientes, matriz_vizinhos_proximos, solucao_valida
 
-def savings_heuristica(dados):
+def calcular_savings(dados, k_vizinhos=None, perfil=PERFIL_INATIVO):
+    """
+    Calcula os savings s(i, j) = d(0, i) + d(0, j) - d(i, j) de forma vetorizada.
+    - k_vizinhos: se informado, considera apenas pares em que um cliente está
+      entre os k mais próximos do outro (poda por lista de vizinhos)
+    - perfil: Perfil (perfil.py) que recebe as fases "savings" e "ordenacao"
+    Retorna arrays (i, j) com i < j, ordenados como a lista de tuplas (s, i, j)
+    em ordem decrescente.
+    """
+    distancias = dados['distancias']
+    deposito = dados['deposito']
+    clientes = np.array(ids_clientes(dados), dtype=np.int64)
+    n_clientes = len(clientes)
+
+    with perfil.fase("savings"):
+        if k_vizinhos is None:
+            a, b = np.triu_indices(n_clientes, k=1)
+            i, j = clientes[a], clientes[b]
+        else:
+            proximos = matriz_vizinhos_proximos(dados, k_vizinhos)
+            perfil.contar("distancias", n_clientes * n_clientes)
+            origem = np.repeat(clientes, proximos.shape[1])
+            destino = proximos.ravel()
+            base = int(clientes.max()) + 1
+            chaves = np.unique(np.minimum(origem, destino) * base + np.maximum(origem, destino))
+            i, j = np.divmod(chaves, base)
+        dist_deposito = distancias[deposito]
+        s = dist_deposito[i] + dist_deposito[j] - distancias[i, j]
+        perfil.contar("distancias", 3 * len(s))
+    with perfil.fase("ordenacao"):
+        # Decrescente em s, com empates decididos por i e depois j (também decrescentes)
+        ordem = np.lexsort((j, i, s))[::-1]
+        return i[ordem], j[ordem]
+
+def savings_heuristica(dados, k_vizinhos=None, perfil=PERFIL_INATIVO):
     """
     Implementação da heurística de Savings (Clarke & Wright) para CVRP.
+    - k_vizinhos: poda os pares avaliados aos k vizinhos mais próximos de cada cliente
+    - perfil: Perfil (perfil.py) opcional; fases savings, ordenacao, uniao e validacao
     Retorna lista de rotas (cada rota é uma lista de índices de clientes).
     """
-    coordenadas = dados['coordenadas']
     demandas = dados['demandas']
     capacidade = dados['capacidade']
-    n_clientes = dados['n_clientes']
-    deposito = dados['deposito']
+    clientes = ids_clientes(dados)
+
+    # Inicialmente, cada cliente é atendido por uma rota individual. As rotas são
+    # listas encadeadas (proximo, -1 no fim) indexadas pelo id do cliente e cada
+    # rota guarda seus extremos e sua carga; rota_do_extremo só é mantido para
+    # clientes que são início ou fim de rota.
+    n_ids = max(clientes, default=0) + 1
+    proximo = [-1] * n_ids
+    inicio = list(range(n_ids))
+    fim = list(range(n_ids))
+    cargas = [0] * n_ids
+    for c in clientes:
+        cargas[c] = demandas[c]
+    rota_do_extremo = list(range(n_ids))
+
+    ordem_i, ordem_j = calcular_savings(dados, k_vizinhos, perfil)
 
-    # Inicialmente, cada cliente é atendido por uma rota individual
-    rotas = {i: [deposito, i, deposito] for i in range(1, n_clientes + 1)}
-    cargas = {i: demandas[i] for i in range(1, n_clientes + 1)}
-
-    # Calcula savings para todos pares de clientes
-    savings = []
-    for i in range(1, n_clientes + 1):
-        for j in range(i + 1, n_clientes + 1):
-            s = (calcular_distancia(deposito, i, coordenadas) +
-                 calcular_distancia(deposito, j, coordenadas) -
-                 calcular_distancia(i, j, coordenadas))
-            savings.append((s, i, j))
-    # Ordena savings em ordem decrescente
-    savings.sort(reverse=True)
-
-    # Merge de rotas baseado nos savings
-    for s, i, j in savings:
-        rota_i = rotas.get(i)
-        rota_j = rotas.get(j)
-        if rota_i is None or rota_j is None or rota_i == rota_j:
-            continue
-        # Só pode unir se i está no final de uma rota e j no início de outra
-        if rota_i[-2] == i and rota_j[1] == j:
-            carga_total = cargas[i] + cargas[j]
+    with perfil.fase("uniao"):
+        checagens = 0
+        # Merge de rotas baseado nos savings
+        for i, j in zip(ordem_i.tolist(), ordem_j.tolist()):
+            r_i = rota_do_extremo[i]
+            r_j = rota_do_extremo[j]
+            # Só pode unir se i está no final de uma rota e j no início de outra
+            if r_i == r_j or fim[r_i] != i or inicio[r_j] != j:
+                continue
+            carga_total = cargas[r_i] + cargas[r_j]
+            checagens += 1
             # Verifica capacidade
             if carga_total <= capacidade:
-                # Une as rotas
-                nova_rota = rota_i[:-1] + rota_j[1:]
-                # Atualiza rotas e cargas
-                for cliente in nova_rota[1:-1]:
-                    rotas[cliente] = nova_rota
-                cargas[nova_rota[1]] = carga_total
-                cargas[nova_rota[-2]] = carga_total
-    # Extrai rotas únicas
-    rotas_unicas = []
-    vistas = set()
-    for rota in rotas.values():
-        rota_tuple = tuple(rota)
-        if rota_tuple not in vistas:
-            # Remove depósito dos extremos para compatibilidade
-            rotas_unicas.append(rota[1:-1])
-            vistas.add(rota_tuple)
-    # Verifica validade final
-    if not solucao_valida(rotas_unicas, dados):
-        # Se não for válida, retorna rotas individuais
-        rotas_unicas = [[i] for i in range(1, n_clientes + 1)]
+                # Une as rotas em O(1): encadeia i -> j e atualiza os extremos
+                proximo[i] = j
+                fim[r_i] = fim[r_j]
+                rota_do_extremo[fim[r_j]] = r_i
+                cargas[r_i] = carga_total
+                inicio[r_j] = fim[r_j] = -1
+        perfil.contar("viabilidade", checagens)
+        # Extrai rotas, ordenadas pelo menor cliente de cada uma
+        rotas_unicas = []
+        for r in clientes:
+            if inicio[r] == -1:
+                continue
+            rota = []
+            cliente = inicio[r]
+            while cliente != -1:
+                rota.append(cliente)
+                cliente = proximo[cliente]
+            rotas_unicas.append(rota)
+        rotas_unicas.sort(key=min)
+    with perfil.fase("validacao"):
+        perfil.contar("viabilidade")
+        # Verifica validade final
+        if not solucao_valida(rotas_unicas, dados):
+            # Se não for válida, retorna rotas individuais
+            rotas_unicas = gerar_solucao_inicial(dados)
     return rotas_unicas
@@ -0,0 +1,154 @@
+
+# indice_espacial.py
+
+import heapq
+import math
+
+class IndiceEspacial:
+    """
+    Índice espacial em grade uniforme sobre as coordenadas dos nós, com remoção.
+    Responde consultas de vizinho mais próximo e k mais próximos entre os nós
+    ainda presentes no índice, percorrendo anéis de células a partir da célula
+    da consulta até que nenhuma célula não visitada possa conter um nó melhor.
+    As distâncias seguem a mesma fórmula da matriz de distâncias (inclusive o
+    arredondamento EUC_2D, se ativado) e empates são resolvidos pelo menor id,
+    de modo que os resultados coincidem com um min() sobre a matriz.
+    """
+    __slots__ = ("coordenadas", "arredondar", "x0", "y0", "lado", "nx", "ny",
+                 "celulas", "celula_do_no", "tamanho", "avaliacoes")
+
+    def __init__(self, coordenadas, nos, arredondar=False, nos_por_celula=2):
+        """
+        - coordenadas: dict idx -> (x, y) (deve conter também os pontos de consulta)
+        - nos: ids dos nós indexados
+        - arredondar: usa o arredondamento EUC_2D do TSPLIB nas distâncias
+        """
+        nos = list(nos)
+        self.coordenadas = coordenadas
+        self.arredondar = arredondar
+        self.tamanho = len(nos)
+        self.avaliacoes = 0  # distâncias calculadas pelas consultas (para perfis)
+        xs = [coordenadas[i][0] for i in nos] or [0.0]
+        ys = [coordenadas[i][1] for i in nos] or [0.0]
+        self.x0, self.y0 = min(xs), min(ys)
+        largura = max(max(xs) - self.x0, 1e-9)
+        altura = max(max(ys) - self.y0, 1e-9)
+        n_celulas = max(1, len(nos) // nos_por_celula)
+        self.lado = max(math.sqrt(largura * altura / n_celulas), largura / n_celulas,
+                        altura / n_celulas)
+        self.nx = int(largura / self.lado) + 1
+        self.ny = int(altura / self.lado) + 1
+        self.celulas = [[] for _ in range(self.nx * self.ny)]
+        self.celula_do_no = {}
+        for i in nos:
+            celula = self._celula(*coordenadas[i])
+            self.celulas[celula].append(i)
+            self.celula_do_no[i] = celula
+
+    def __len__(self):
+        return self.tamanho
+
+    def __contains__(self, no):
+        return no in self.celula_do_no
+
+    def _coluna_linha(self, x, y):
+        cx = min(max(int((x - self.x0) / self.lado), 0), self.nx - 1)
+        cy = min(max(int((y - self.y0) / self.lado), 0), self.ny - 1)
+        return cx, cy
+
+    def _celula(self, x, y):
+        cx, cy = self._coluna_linha(x, y)
+        return cx * self.ny + cy
+
+    def _distancia(self, x, y, no):
+        xn, yn = self.coordenadas[no]
+        dx = xn - x
+        dy = yn - y
+        d = math.sqrt(dx * dx + dy * dy)
+        if self.arredondar:
+            d = math.floor(d + 0.5)
+        return d
+
+    def _limite(self, anel):
+        # Nós em anéis posteriores a `anel` estão a pelo menos anel * lado da consulta
+        d = anel * self.lado
+        if self.arredondar:
+            d = math.floor(d + 0.5)
+        return d
+
+    def _anel(self, cx, cy, r):
+        """Gera as células (não vazias) a distância de Chebyshev r de (cx, cy)."""
+        celulas = self.celulas
+        ny = self.ny
+        if r == 0:
+            yield celulas[cx * ny + cy]
+            return
+        x_min, x_max = max(cx - r, 0), min(cx + r, self.nx - 1)
+        y_min, y_max = max(cy - r, 0), min(cy + r, ny - 1)
+        for x in range(x_min, x_max + 1):
+            borda_x = x == cx - r or x == cx + r
+            if borda_x:
+                for y in range(y_min, y_max + 1):
+                    celula = celulas[x * ny + y]
+                    if celula:
+                        yield celula
+            else:
+                if cy - r >= 0:
+                    celula = celulas[x * ny + cy - r]
+                    if celula:
+                        yield celula
+                if cy + r < ny:
+                    celula = celulas[x * ny + cy + r]
+                    if celula:
+                        yield celula
+
+    def remover(self, no):
+        """Remove o nó do índice (consultas futuras não o retornam)."""
+        celula = self.celula_do_no.pop(no)
+        self.celulas[celula].remove(no)
+        self.tamanho -= 1
+
+    def mais_proximo(self, x, y):
+        """
+        Retorna o id do nó presente mais próximo de (x, y), ou None se o índice
+        estiver vazio. Empates: menor id.
+        """
+        if self.tamanho == 0:
+            return None
+        cx, cy = self._coluna_linha(x, y)
+        r_max = max(cx, self.nx - 1 - cx, cy, self.ny - 1 - cy)
+        melhor, melhor_d = None, math.inf
+        for r in range(r_max + 1):
+            for celula in self._anel(cx, cy, r):
+                self.avaliacoes += len(celula)
+                for no in celula:
+                    d = self._distancia(x, y, no)
+                    if d < melhor_d or (d == melhor_d and no < melhor):
+                        melhor, melhor_d = no, d
+            if melhor is not None and self._limite(r) > melhor_d:
+                break
+        return melhor
+
+    def k_mais_proximos(self, x, y, k):
+        """
+        Retorna os ids dos k nós presentes mais próximos de (x, y), em ordem
+        crescente de distância (empates: menor id).
+        """
+        if k <= 0 or self.tamanho == 0:
+            return []
+        cx, cy = self._coluna_linha(x, y)
+        r_max = max(cx, self.nx - 1 - cx, cy, self.ny - 1 - cy)
+        # Heap de máximo (pela chave (d, id)) com os k melhores encontrados
+        melhores = []
+        for r in range(r_max + 1):
+            for celula in self._anel(cx, cy, r):
+                self.avaliacoes += len(celula)
+                for no in celula:
+                    chave = (-self._distancia(x, y, no), -no)
+                    if len(melhores) < k:
+                        heapq.heappush(melhores, chave)
+                    elif chave > melhores[0]:
+                        heapq.heapreplace(melhores, chave)
+            if len(melhores) == k and self._limite(r) > -melhores[0][0]:
+                break
+        return [-no for _, no in sorted(melhores, reverse=True)]
@@ -0,0 +1,147 @@
+
+# instancia.py
+
+from collections.abc import MutableMapping
+import numpy as np
+from utils import construir_matriz_distancias
+
+# Chaves do dicionário `dados` tradicional, expostas pela visão compatível
+CHAVES_DADOS = ("coordenadas", "demandas", "capacidade", "deposito", "n_clientes",
+                "arredondar", "distancias", "clientes", "pesos")
+
+class Instancia(MutableMapping):
+    """
+    Instância CVRP em arrays contíguos.
+    - ids: id de cada nó (int64), na ordem densa 0..n_nos-1
+    - coordenadas: float64 (n_nos, 2), linha k = coordenadas do nó ids[k]
+    - demandas: int64 (n_nos,)
+    - deposito: id do depósito, mantido à parte dos clientes (ver `clientes`)
+    Também se comporta como o dicionário `dados` usado pelas heurísticas
+    (dados['coordenadas'], dados['demandas'], dados['distancias'], ...): as
+    visões por id e a matriz de distâncias são construídas sob demanda e
+    guardadas. Chaves extras (caches das heurísticas) podem ser atribuídas.
+    """
+    __slots__ = ("nome", "ids", "coordenadas", "demandas", "capacidade", "deposito",
+                 "depositos", "n_clientes", "arredondar", "pesos", "posicao",
+                 "_visoes", "_extras")
+
+    def __init__(self, ids, coordenadas, demandas, capacidade, deposito,
+                 n_clientes=None, arredondar=False, nome=None, depositos=None, pesos=None):
+        """
+        - depositos: todos os depósitos da instância (o primeiro é `deposito`)
+        - pesos: matriz explícita (EDGE_WEIGHT_SECTION) na ordem densa dos nós;
+          quando informada, substitui as distâncias euclidianas
+        """
+        self.nome = nome
+        self.ids = np.ascontiguousarray(ids, dtype=np.int64)
+        self.coordenadas = np.ascontiguousarray(coordenadas, dtype=np.float64).reshape(-1, 2)
+        self.demandas = np.ascontiguousarray(demandas, dtype=np.int64)
+        self.capacidade = None if capacidade is None or capacidade < 0 else int(capacidade)
+        self.deposito = int(deposito)
+        self.depositos = [self.deposito] if depositos is None else [int(d) for d in depositos]
+        self.pesos = None if pesos is None else np.asarray(pesos, dtype=np.float64)
+        self.n_clientes = len(self.ids) - len(self.depositos) if n_clientes is None else int(n_clientes)
+        self.arredondar = bool(arredondar)
+        # posicao[id] = índice denso do nó (-1 para ids inexistentes)
+        self.posicao = np.full(int(self.ids.max()) + 1 if len(self.ids) else 1, -1, dtype=np.int64)
+        self.posicao[self.ids] = np.arange(len(self.ids))
+        self._visoes = {}
+        self._extras = {}
+
+    @property
+    def n_nos(self):
+        return len(self.ids)
+
+    @property
+    def indice_deposito(self):
+        return int(self.posicao[self.deposito])
+
+    @property
+    def clientes(self):
+        """Ids dos clientes (todos os nós exceto os depósitos)."""
+        return self.ids[~np.isin(self.ids, self.depositos)]
+
+    @property
+    def tem_coordenadas(self):
+        """False para instâncias EXPLICIT sem NODE_COORD/DISPLAY_DATA_SECTION."""
+        return not np.isnan(self.coordenadas).any()
+
+    def por_id(self, valores, preenchimento=0):
+        """Espalha um array denso em um array indexado pelo id do nó."""
+        saida = np.full((len(self.posicao),) + valores.shape[1:], preenchimento, dtype=valores.dtype)
+        saida[self.ids] = valores
+        return saida
+
+    @property
+    def demandas_por_id(self):
+        if "demandas_por_id" not in self._visoes:
+            self._visoes["demandas_por_id"] = self.por_id(self.demandas)
+        return self._visoes["demandas_por_id"]
+
+    @property
+    def distancias(self):
+        """Matriz densa de distâncias indexada pelo id do nó (construída sob demanda)."""
+        if "distancias" not in self._visoes:
+            if self.pesos is not None:
+                distancias = np.zeros((len(self.posicao), len(self.posicao)))
+                distancias[np.ix_(self.ids, self.ids)] = self.pesos
+            else:
+                distancias = construir_matriz_distancias(self.por_id(self.coordenadas),
+                                                         self.arredondar)
+            self._visoes["distancias"] = distancias
+        return self._visoes["distancias"]
+
+    # Visão compatível com o dicionário `dados`
+
+    def __getitem__(self, chave):
+        if chave == "coordenadas":
+            if not self.tem_coordenadas:
+                return {}
+            if "coordenadas" not in self._visoes:
+                self._visoes["coordenadas"] = dict(zip(self.ids.tolist(),
+                                                       map(tuple, self.coordenadas.tolist())))
+            return self._visoes["coordenadas"]
+        if chave == "demandas":
+            if "demandas" not in self._visoes:
+                self._visoes["demandas"] = dict(zip(self.ids.tolist(), self.demandas.tolist()))
+            return self._visoes["demandas"]
+        if chave == "distancias":
+            return self.distancias
+        if chave == "clientes":
+            if "clientes" not in self._visoes:
+                self._visoes["clientes"] = sorted(self.clientes.tolist())
+            return self._visoes["clientes"]
+        if chave in ("capacidade", "deposito", "n_clientes", "arredondar", "pesos"):
+            return getattr(self, chave)
+        return self._extras[chave]
+
+    def __setitem__(self, chave, valor):
+        if chave in CHAVES_DADOS:
+            raise TypeError(f"'{chave}' é somente leitura em uma Instancia")
+        self._extras[chave] = valor
+
+    def __delitem__(self, chave):
+        del self._extras[chave]
+
+    def __iter__(self):
+        yield from CHAVES_DADOS
+        yield from self._extras
+
+    def __len__(self):
+        return len(CHAVES_DADOS) + len(self._extras)
+
+    def __repr__(self):
+        return (f"Instancia(nome={self.nome!r}, n_nos={self.n_nos}, "
+                f"capacidade={self.capacidade}, deposito={self.deposito})")
+
+    # Serialização (ex.: envio a processos do Pool) sem visões e caches derivados
+
+    def __getstate__(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__
+                if campo not in ("_visoes", "_extras")}
+
+    def __setstate__(self, estado):
+        for campo, valor in estado.items():
+            setattr(self, campo, valor)
+        self._visoes = {}
+        self._extras = {}
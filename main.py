@@ -1,107 +1,232 @@
 
 import os
-import csv
+import random
+import sys
 import time
 from multiprocessing import Pool
 from parser import ler_instancia_cvrp
-from heuristics.savings import savings_heuristica
-from heuristics.insertion import insertion_heuristica
-from heuristics.route_first import route_first_cluster_second
+from heuristics import HEURISTICAS
 from metaheuristics.tabu_search import tabu_search
-from utils import calcular_custo_total, avaliar_solucao
+from metaheuristics.lns import lns
+from metaheuristics.ilhas import busca_ilhas
+from utils import calcular_custo_total
+from rastro import Rastro
+from perfil import Perfil
+from armazenamento import ArmazemResultados, chave_config, versao_codigo
 
 # Configurações
 PASTA_INSTANCIAS = "instances"
 PASTA_RESULTADOS = "resultados"
-TEMPO_LIMITE = 1 * 30  # 30 minutos em segundos
+ARQUIVO_RESULTADOS = os.path.join(PASTA_RESULTADOS, "resultados.db")
+PASTA_RASTROS = os.path.join(PASTA_RESULTADOS, "rastros")
+TEMPO_LIMITE = 1 * 30  # 30 segundos (o protocolo completo usa 30 * 60)
 
-HEURISTICAS = {
-    "Savings": savings_heuristica,
-    "Insertion": insertion_heuristica,
-    "RouteFirstClusterSecond": route_first_cluster_second
-}
+# Heurística construtiva (chave de HEURISTICAS) que gera a solução inicial da Tabu Search
+SOLUCAO_INICIAL = "Savings"
 
+# Iterações da Tabu Search sem melhora até a diversificação perturbar a melhor
+# solução (as execuções sempre usam todo o TEMPO_LIMITE)
+MAX_ITER_SEM_MELHORA = 20
+
+# A Tabu Search avalia só os movimentos entre cada cliente e seus
+# K_VIZINHOS_TABU vizinhos mais próximos (vizinhança granular)
+K_VIZINHOS_TABU = 30
+
+# Tudo o que molda uma execução fica na configuração, que faz parte da chave
+# de retomada (chave_config): mudar o tempo limite, a solução inicial ou um
+# parâmetro refaz as execuções em vez de reaproveitar as antigas
 METAHEURISTICA_CONFIGS = [
-    {"nome": "TabuSearch_Simples", "intensificacao": False, "diversificacao": False},
-    {"nome": "TabuSearch_Intensificacao", "intensificacao": True, "diversificacao": False},
-    {"nome": "TabuSearch_Diversificacao", "intensificacao": False, "diversificacao": True},
-    {"nome": "TabuSearch_Completo", "intensificacao": True, "diversificacao": True}
+    {"nome": "TabuSearch_Simples", "intensificacao": False, "diversificacao": False,
+     "solucao_inicial": SOLUCAO_INICIAL, "tempo_limite": TEMPO_LIMITE,
+     "granular": True, "k_vizinhos": K_VIZINHOS_TABU},
+    {"nome": "TabuSearch_Intensificacao", "intensificacao": True, "diversificacao": False,
+     "solucao_inicial": SOLUCAO_INICIAL, "tempo_limite": TEMPO_LIMITE,
+     "granular": True, "k_vizinhos": K_VIZINHOS_TABU},
+    {"nome": "TabuSearch_Diversificacao", "intensificacao": False, "diversificacao": True,
+     "max_iter_sem_melhora": MAX_ITER_SEM_MELHORA, "solucao_inicial": SOLUCAO_INICIAL,
+     "tempo_limite": TEMPO_LIMITE, "granular": True, "k_vizinhos": K_VIZINHOS_TABU},
+    {"nome": "TabuSearch_Completo", "intensificacao": True, "diversificacao": True,
+     "max_iter_sem_melhora": MAX_ITER_SEM_MELHORA, "solucao_inicial": SOLUCAO_INICIAL,
+     "tempo_limite": TEMPO_LIMITE, "granular": True, "k_vizinhos": K_VIZINHOS_TABU},
+    {"nome": "LNS_SA", "algoritmo": "LNS", "aceitacao": "sa", "solucao_inicial": SOLUCAO_INICIAL,
+     "tempo_limite": TEMPO_LIMITE},
+    {"nome": "LNS_RRT", "algoritmo": "LNS", "aceitacao": "rrt", "solucao_inicial": SOLUCAO_INICIAL,
+     "tempo_limite": TEMPO_LIMITE}
 ]
 
-def salvar_resultados_csv(resultados, nome_csv):
-    campos = [
-        "Instancia", "Metodo", "Custo", "Tempo (s)", "Qtd Rotas", "Qtd Veiculos",
-        "Intensificacao", "Diversificacao", "Solucao"
-    ]
-    existe = os.path.exists(nome_csv)
-    with open(nome_csv, "a", newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=campos)
-        if not existe:
-            writer.writeheader()
-        for r in resultados:
-            writer.writerow(r)
-
-def rodar_para_instancia(arquivo):
-    if not os.path.exists(PASTA_RESULTADOS):
-        os.makedirs(PASTA_RESULTADOS)
-    resultados = []
-    caminho = os.path.join(PASTA_INSTANCIAS, arquivo)
-    print(f"\nProcessando instância: {arquivo}")
-    dados = ler_instancia_cvrp(caminho)
-    # Heurísticas construtivas
-    for nome, funcao in HEURISTICAS.items():
-        print(f"  Rodando heurística: {nome} ({arquivo})")
-        inicio = time.time()
-        solucao = funcao(dados)
-        fim = time.time()
-        custo = calcular_custo_total(solucao, dados)
-        rotas = len(solucao)
-        resultado = {
-            "Instancia": arquivo,
-            "Metodo": nome,
-            "Custo": custo,
-            "Tempo (s)": round(fim - inicio, 2),
-            "Qtd Rotas": rotas,
-            "Qtd Veiculos": rotas,
-            "Intensificacao": "",
-            "Diversificacao": "",
-            "Solucao": str(solucao)
-        }
-        resultados.append(resultado)
-        print(f"    Custo: {custo} | Tempo: {fim-inicio:.2f}s | Rotas: {rotas} ({arquivo})")
-    # Metaheurística
-    #for config in METAHEURISTICA_CONFIGS:
-    #    print(f"  Rodando metaheurística: {config['nome']} ({arquivo})")
-    #    inicio = time.time()
-    #    solucao = tabu_search(
-    #        dados,
-    #        tempo_limite=TEMPO_LIMITE,
-    #        intensificacao=config["intensificacao"],
-    #        diversificacao=config["diversificacao"]
-    #    )
-    #    fim = time.time()
-    #    custo = calcular_custo_total(solucao, dados)
-    #    rotas = len(solucao)
-    #    resultado = {
-    #        "Instancia": arquivo,
-    #        "Metodo": config["nome"],
-    #        "Custo": custo,
-    #        "Tempo (s)": round(fim - inicio, 2),
-    #        "Qtd Rotas": rotas,
-    #        "Qtd Veiculos": rotas,
-    #        "Intensificacao": config["intensificacao"],
-    #        "Diversificacao": config["diversificacao"],
-    #        "Solucao": str(solucao)
-    #    }
-    #    resultados.append(resultado)
-    #    print(f"    Custo: {custo} | Tempo: {fim-inicio:.2f}s | Rotas: {rotas} ({arquivo})")
-    nome_csv = os.path.join(PASTA_RESULTADOS, f"resultados_{arquivo}.csv")
-    salvar_resultados_csv(resultados, nome_csv)
-    print(f"\nResultados salvos em {nome_csv}")
+# Busca paralela por modelo de ilhas (ativada com --ilhas): roda depois do
+# pool de tarefas, uma instância por vez, com uma ilha por núcleo
+ILHAS_CONFIG = {"nome": "Ilhas", "algoritmo": "Ilhas", "solucao_inicial": SOLUCAO_INICIAL,
+                "tempo_limite": TEMPO_LIMITE}
+ILHAS = False
+
+# Perfil por fase das heurísticas construtivas (ativado com --perfil): tempos
+# por fase, contadores e pico de memória, gravados na tabela de perfis do armazém
+PERFILAR = False
+
+# Sementes aleatórias de cada configuração de metaheurística
+SEMENTES = [0]
+
+# Cache de instâncias por processo (cada worker lê cada instância uma vez)
+_INSTANCIAS = {}
+
+def carregar_instancia(arquivo):
+    if arquivo not in _INSTANCIAS:
+        _INSTANCIAS[arquivo] = ler_instancia_cvrp(os.path.join(PASTA_INSTANCIAS, arquivo))
+    return _INSTANCIAS[arquivo]
+
+def gerar_tarefas(arquivos_instancias, ilhas=ILHAS):
+    """
+    Expande a grade instância x método x configuração x semente em tarefas
+    independentes, ordenadas da mais longa para a mais curta (estimativa).
+    As heurísticas construtivas são determinísticas e rodam uma vez por instância.
+    - ilhas: inclui uma tarefa de busca por ilhas (ILHAS_CONFIG) por instância
+    """
+    tarefas = []
+    for arquivo in arquivos_instancias:
+        # O tamanho do arquivo é proporcional ao número de nós
+        tamanho = os.path.getsize(os.path.join(PASTA_INSTANCIAS, arquivo))
+        for nome in HEURISTICAS:
+            tarefas.append({"instancia": arquivo, "metodo": nome, "config": None,
+                            "semente": SEMENTES[0], "estimativa": tamanho * 1e-6})
+        for config in METAHEURISTICA_CONFIGS:
+            for semente in SEMENTES:
+                tarefas.append({"instancia": arquivo, "metodo": config["nome"], "config": config,
+                                "semente": semente,
+                                "estimativa": config["tempo_limite"] + tamanho * 1e-6})
+        if ilhas:
+            tarefas.append({"instancia": arquivo, "metodo": ILHAS_CONFIG["nome"], "config": ILHAS_CONFIG,
+                            "semente": SEMENTES[0],
+                            "estimativa": ILHAS_CONFIG["tempo_limite"] + tamanho * 1e-6})
+    tarefas.sort(key=lambda t: t["estimativa"], reverse=True)
+    return tarefas
+
+def caminho_rastro(tarefa):
+    """Arquivo do perfil de convergência de uma execução de metaheurística."""
+    base = os.path.splitext(tarefa["instancia"])[0]
+    return os.path.join(PASTA_RASTROS, f"{base}_{tarefa['metodo']}_s{tarefa['semente']}.npz")
+
+def executar_tarefa(tarefa):
+    """
+    Executa uma tarefa (heurística ou metaheurística em uma instância) e
+    retorna a linha de resultado. Execuções de metaheurística também gravam
+    seu rastro de convergência em PASTA_RASTROS; com tarefa["perfil"], a
+    heurística roda instrumentada e a linha ganha a chave "Perfil".
+    """
+    arquivo = tarefa["instancia"]
+    config = tarefa["config"]
+    dados = carregar_instancia(arquivo)
+    random.seed(tarefa["semente"])
+    perfil = Perfil() if tarefa.get("perfil") and config is None else None
+    rastro = None
+    inicio = time.time()
+    if perfil is not None:
+        perfil.iniciar()
+        solucao = HEURISTICAS[tarefa["metodo"]](dados, perfil=perfil)
+        perfil.finalizar()
+    elif config is None:
+        solucao = HEURISTICAS[tarefa["metodo"]](dados)
+    elif config.get("algoritmo") == "Ilhas":
+        rastro = Rastro()
+        solucao = busca_ilhas(
+            dados,
+            tempo_limite=config["tempo_limite"],
+            semente=tarefa["semente"],
+            solucao_inicial=config.get("solucao_inicial"),
+            rastro=rastro
+        )
+    elif config.get("algoritmo") == "LNS":
+        rastro = Rastro()
+        solucao = lns(
+            dados,
+            tempo_limite=config["tempo_limite"],
+            solucao_inicial=config.get("solucao_inicial"),
+            aceitacao=config["aceitacao"],
+            rastro=rastro
+        )
+    else:
+        rastro = Rastro()
+        solucao = tabu_search(
+            dados,
+            tempo_limite=config["tempo_limite"],
+            intensificacao=config["intensificacao"],
+            diversificacao=config["diversificacao"],
+            max_iter_sem_melhora=config.get("max_iter_sem_melhora"),
+            granular=config.get("granular", False),
+            k_vizinhos=config.get("k_vizinhos", 30),
+            solucao_inicial=config.get("solucao_inicial"),
+            rastro=rastro
+        )
+    fim = time.time()
+    if rastro is not None:
+        rastro.gravar(caminho_rastro(tarefa))
+    custo = calcular_custo_total(solucao, dados)
+    rotas = len(solucao)
+    return {
+        "Instancia": arquivo,
+        "Metodo": tarefa["metodo"],
+        "Custo": custo,
+        "Tempo (s)": round(fim - inicio, 2),
+        "Qtd Rotas": rotas,
+        "Qtd Veiculos": rotas,
+        "Intensificacao": config.get("intensificacao", "") if config else "",
+        "Diversificacao": config.get("diversificacao", "") if config else "",
+        "Solucao": solucao,
+        "Config": chave_config(config),
+        "Semente": tarefa["semente"],
+        "Perfil": perfil.colunas() if perfil is not None else None
+    }
+
+def executar_experimentos(arquivos_instancias, processos=None, perfilar=PERFILAR, ilhas=ILHAS):
+    """
+    Roda todas as tarefas ainda não concluídas na versão atual do código em um
+    pool de processos (uma tarefa por vez por worker, mais longas primeiro) e
+    grava cada resultado no armazém assim que termina.
+    - perfilar: também roda as heurísticas construtivas com perfil por fase
+      (ainda sem perfil na versão), em tarefas à parte: o perfil é gravado na
+      tabela de perfis e não substitui a linha cronometrada
+    - ilhas: também roda a busca por ilhas; essas tarefas criam seus próprios
+      processos, então rodam neste processo, depois do pool
+    """
+    versao = versao_codigo()
+    with ArmazemResultados(ARQUIVO_RESULTADOS) as armazem:
+        concluidas = armazem.concluidas(versao)
+        perfiladas = armazem.perfiladas(versao) if perfilar else set()
+        tarefas = []
+        for t in gerar_tarefas(arquivos_instancias, ilhas):
+            chave = (t["instancia"], t["metodo"], chave_config(t["config"]), t["semente"])
+            if chave not in concluidas:
+                tarefas.append(t)
+            if perfilar and t["config"] is None and chave not in perfiladas:
+                tarefas.append(dict(t, perfil=True))
+        if not tarefas:
+            print(f"Nada a fazer: todas as tarefas já concluídas (versão {versao})")
+            return
+        processos = min(processos or os.cpu_count() or 1, len(tarefas))
+        print(f"{len(tarefas)} tarefas em {processos} processos (versão {versao}, "
+              f"{len(concluidas)} já concluídas)")
+        paralelas = [t for t in tarefas if t["config"] is ILHAS_CONFIG]
+        tarefas = [t for t in tarefas if t["config"] is not ILHAS_CONFIG]
+
+        def gravar(resultado):
+            armazem.gravar(resultado, versao)
+            rotulo = " [perfil]" if resultado.get("Perfil") else ""
+            print(f"  {resultado['Metodo']}{rotulo} ({resultado['Instancia']}) | Custo: {resultado['Custo']} | "
+                  f"Tempo: {resultado['Tempo (s)']:.2f}s | Rotas: {resultado['Qtd Rotas']}")
+
+        if tarefas:
+            with Pool(processes=min(processos, len(tarefas))) as pool:
+                for resultado in pool.imap_unordered(executar_tarefa, tarefas, chunksize=1):
+                    gravar(resultado)
+        for tarefa in paralelas:
+            gravar(executar_tarefa(tarefa))
 
 if __name__ == "__main__":
-    arquivos_instancias = [f for f in os.listdir(PASTA_INSTANCIAS) if f.endswith(".vrp") or f.endswith(".txt")]
+    # python main.py consolidar -> apenas regrava as tabelas de resumo
+    if sys.argv[1:2] == ["consolidar"]:
+        from consolidacao import consolidar
+        consolidar(PASTA_RESULTADOS, ARQUIVO_RESULTADOS)
+        sys.exit(0)
     arquivos_instancias = sorted([f for f in os.listdir(PASTA_INSTANCIAS) if f.endswith(".vrp") or f.endswith(".txt")])
-    # Pool com 2 processos
-    with Pool(processes=1) as pool:
-        pool.map(rodar_para_instancia, arquivos_instancias)
+    executar_experimentos(arquivos_instancias, perfilar=PERFILAR or "--perfil" in sys.argv[1:],
+                          ilhas=ILHAS or "--ilhas" in sys.argv[1:])
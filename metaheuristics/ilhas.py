@@ -0,0 +1,155 @@
+
+# metaheuristics/ilhas.py
+
+import os
+import random
+import time
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import wait
+from heuristics import HEURISTICAS
+from metaheuristics.tabu_search import tabu_search
+from metaheuristics.lns import lns
+from utils import calcular_custo_total, gerar_solucao_inicial, solucao_valida
+
+# Modelo de ilhas: N processos rodam Tabu Search ou LNS com sementes e
+# configurações diferentes, cada um uma única vez, até o prazo comum. A cada
+# intervalo_troca segundos, de dentro da metaheurística (parâmetro troca),
+# cada ilha envia sua melhor solução ao coordenador (por um Pipe) e recebe a
+# elite global, da qual continua se for melhor que a sua. Assim o
+# resfriamento da LNS e a memória tabu seguem ao longo de toda a execução.
+
+METAHEURISTICAS = {
+    "TabuSearch": tabu_search,
+    "LNS": lns,
+}
+
+# Configurações das ilhas, distribuídas em rodízio entre os processos
+CONFIGS_ILHAS = [
+    {"algoritmo": "LNS", "aceitacao": "sa"},
+    {"algoritmo": "TabuSearch", "intensificacao": True, "diversificacao": True,
+     "granular": True, "max_iter_sem_melhora": 100},
+    {"algoritmo": "LNS", "aceitacao": "rrt"},
+    {"algoritmo": "LNS", "aceitacao": "sa", "remocoes": ("string",), "k_regret": 3},
+]
+INTERVALO_TROCA = 30  # segundos entre trocas de elite
+
+def _ilha(conexao, dados, config, semente, prazo, intervalo_troca, solucao_inicial):
+    """
+    Processo de uma ilha: roda a metaheurística uma vez até o prazo, trocando
+    a melhor solução pelo Pipe a cada intervalo_troca segundos e ao final.
+    Termina enviando None.
+    """
+    random.seed(semente)
+    parametros = dict(config)
+    algoritmo = METAHEURISTICAS[parametros.pop("algoritmo")]
+    proxima_troca = time.time() + intervalo_troca
+
+    def trocar(custo, solucao):
+        """Envia (custo, solucao) e recebe a elite global."""
+        conexao.send((custo, solucao))
+        custo_elite, elite = conexao.recv()
+        return elite if custo_elite < custo else None
+
+    def troca(custo, solucao):
+        nonlocal proxima_troca
+        if time.time() < proxima_troca:
+            return None
+        proxima_troca = time.time() + intervalo_troca
+        return trocar(custo, solucao)
+
+    try:
+        restante = prazo - time.time()
+        if restante > 0:
+            solucao = algoritmo(dados, tempo_limite=restante, solucao_inicial=solucao_inicial,
+                                troca=troca, **parametros)
+            trocar(calcular_custo_total(solucao, dados), solucao)
+    finally:
+        conexao.send(None)
+        conexao.close()
+
+def busca_ilhas(
+    dados,
+    tempo_limite=1800,
+    processos=None,
+    configs=None,
+    intervalo_troca=INTERVALO_TROCA,
+    semente=0,
+    solucao_inicial="Savings",
+    rastro=None
+):
+    """
+    Busca paralela por modelo de ilhas.
+    - dados: dicionário com informações da instância (coordenadas, demandas, capacidade, etc)
+    - tempo_limite: tempo máximo de execução (segundos, de relógio)
+    - processos: número de ilhas; se None, os.cpu_count()
+    - configs: configurações das ilhas (dicts com "algoritmo", chave de
+      METAHEURISTICAS, e os demais parâmetros da metaheurística), usadas em
+      rodízio; se None, CONFIGS_ILHAS
+    - intervalo_troca: segundos entre as trocas de elite
+    - semente: a ilha i usa a semente semente + i
+    - solucao_inicial: solução inicial de todas as ilhas (lista de rotas,
+      nome de heurística construtiva ou None), construída uma vez aqui; é
+      também a elite inicial, devolvida se nenhuma ilha a melhorar
+    - rastro: Rastro (rastro.py) opcional que recebe a evolução da elite
+      (uma iteração por solução recebida das ilhas)
+    Retorna a melhor solução encontrada por todas as ilhas (lista de rotas).
+    """
+    prazo = time.time() + tempo_limite
+    if rastro is not None:
+        rastro.iniciar()
+    processos = processos or os.cpu_count() or 1
+    configs = configs or CONFIGS_ILHAS
+    desconhecidos = [c["algoritmo"] for c in configs if c["algoritmo"] not in METAHEURISTICAS]
+    if desconhecidos:
+        raise ValueError(f"Metaheurísticas desconhecidas: {desconhecidos}")
+    if solucao_inicial is None:
+        solucao_inicial = gerar_solucao_inicial(dados)
+    elif isinstance(solucao_inicial, str):
+        if solucao_inicial not in HEURISTICAS:
+            raise ValueError(f"Heurística desconhecida: {solucao_inicial}")
+        solucao_inicial = HEURISTICAS[solucao_inicial](dados)
+    if not solucao_valida(solucao_inicial, dados):
+        raise ValueError("Solução inicial inválida para a busca por ilhas")
+
+    conexoes = []
+    ilhas = []
+    for i in range(processos):
+        local, remota = Pipe()
+        ilha = Process(target=_ilha, args=(remota, dados, configs[i % len(configs)], semente + i,
+                                           prazo, intervalo_troca, solucao_inicial))
+        ilha.start()
+        remota.close()
+        conexoes.append(local)
+        ilhas.append(ilha)
+
+    melhor_custo = calcular_custo_total(solucao_inicial, dados)
+    melhor_solucao = solucao_inicial
+    recebidas = 0
+    if rastro is not None:
+        rastro.registrar(recebidas, melhor_custo, melhor_custo, 0, melhorou=True)
+    try:
+        while conexoes:
+            for conexao in wait(conexoes):
+                try:
+                    mensagem = conexao.recv()
+                except EOFError:
+                    mensagem = None
+                if mensagem is None:
+                    conexoes.remove(conexao)
+                    conexao.close()
+                    continue
+                custo, solucao = mensagem
+                recebidas += 1
+                melhorou = custo < melhor_custo and solucao_valida(solucao, dados)
+                if melhorou:
+                    melhor_custo = custo
+                    melhor_solucao = solucao
+                if rastro is not None:
+                    rastro.registrar(recebidas, custo, melhor_custo, 0, melhorou)
+                conexao.send((melhor_custo, melhor_solucao))
+    finally:
+        for ilha in ilhas:
+            ilha.join()
+    if rastro is not None:
+        rastro.finalizar(recebidas, melhor_custo, melhor_custo)
+    return melhor_solucao
@@ -0,0 +1,141 @@
+
+# metaheuristics/lns.py
+
+import math
+import random
+import time
+from heuristics import HEURISTICAS
+from solucao import Solucao
+from metaheuristics.ruina_recriacao import (
+    insercao_regret,
+    remocao_aleatoria,
+    remocao_radial,
+    remocao_strings
+)
+from utils import calcular_vizinhos_proximos, gerar_solucao_inicial
+
+# Operadores de remoção: nome -> função(solucao, k, vizinhos, rng)
+REMOCOES = {
+    "aleatoria": lambda s, k, vizinhos, rng: remocao_aleatoria(s, k, rng),
+    "radial": lambda s, k, vizinhos, rng: remocao_radial(s, k, vizinhos, rng),
+    "string": lambda s, k, vizinhos, rng: remocao_strings(s, k, vizinhos, rng=rng),
+}
+ACEITACOES = ("sa", "rrt")
+
+def lns(
+    dados,
+    tempo_limite=1800,
+    solucao_inicial="Savings",
+    remocoes=("aleatoria", "radial", "string"),
+    k_regret=2,
+    k_remocao_max=None,
+    aceitacao="sa",
+    temperatura_inicial=None,
+    temperatura_final=None,
+    desvio=0.01,
+    rastro=None,
+    rng=random,
+    troca=None
+):
+    """
+    Large Neighborhood Search (ruína e recriação) para o CVRP.
+    A cada iteração um operador de remoção sorteado retira de 1 a
+    k_remocao_max clientes da solução corrente e a inserção regret-k os
+    reinsere; a nova solução é aceita pelo critério escolhido.
+    - dados: dicionário com informações da instância (coordenadas, demandas, capacidade, etc)
+    - tempo_limite: tempo máximo de execução (segundos)
+    - solucao_inicial: lista de rotas, nome de uma heurística construtiva
+      (chave de HEURISTICAS) ou None (cada cliente em uma rota)
+    - remocoes: nomes dos operadores de remoção (chaves de REMOCOES)
+    - k_regret: k da inserção por arrependimento (1 = inserção mais barata)
+    - k_remocao_max: máximo de clientes retirados por iteração; se None,
+      5% dos clientes, entre 10 e 100
+    - aceitacao: "sa" (simulated annealing, com a temperatura caindo
+      geometricamente de temperatura_inicial a temperatura_final ao longo do
+      tempo) ou "rrt" (record-to-record: aceita se o custo não passa de
+      (1 + desvio) vezes o da melhor solução)
+    - temperatura_inicial, temperatura_final: se None, 35% e 0,35% do
+      comprimento médio de uma aresta da solução inicial
+    - rastro: Rastro (rastro.py) opcional que recebe o perfil de convergência
+    - troca: função opcional (melhor_custo, melhor_solucao) -> rotas ou None,
+      chamada ao fim de cada iteração (troca de elite do modelo de ilhas); se
+      devolve uma solução melhor, a busca continua a partir dela, sem
+      reiniciar o resfriamento
+    Retorna a melhor solução encontrada (lista de rotas).
+    """
+    inicio = time.time()
+    if rastro is not None:
+        rastro.iniciar()
+    if aceitacao not in ACEITACOES:
+        raise ValueError(f"Critério de aceitação desconhecido: {aceitacao}")
+    desconhecidas = [nome for nome in remocoes if nome not in REMOCOES]
+    if desconhecidas:
+        raise ValueError(f"Remoções desconhecidas: {desconhecidas}")
+    operadores = [REMOCOES[nome] for nome in remocoes]
+    if solucao_inicial is None:
+        solucao_inicial = gerar_solucao_inicial(dados)
+    elif isinstance(solucao_inicial, str):
+        if solucao_inicial not in HEURISTICAS:
+            raise ValueError(f"Heurística desconhecida: {solucao_inicial}")
+        solucao_inicial = HEURISTICAS[solucao_inicial](dados)
+
+    n_clientes = dados['n_clientes']
+    if k_remocao_max is None:
+        k_remocao_max = min(100, max(10, n_clientes // 20))
+    k_remocao_max = max(1, min(k_remocao_max, n_clientes - 1))
+    vizinhos = calcular_vizinhos_proximos(dados, k_remocao_max)
+
+    atual = Solucao(solucao_inicial, dados)
+    melhor_solucao = atual.copiar_rotas()
+    melhor_custo = atual.custo
+    aresta_media = atual.custo / (n_clientes + len(atual))
+    if temperatura_inicial is None:
+        temperatura_inicial = 0.35 * aresta_media
+    if temperatura_final is None:
+        temperatura_final = temperatura_inicial / 100
+    iteracao = 0
+    if rastro is not None:
+        rastro.registrar(iteracao, atual.custo, melhor_custo, 0, melhorou=True)
+
+    while (time.time() - inicio) < tempo_limite:
+        iteracao += 1
+        custo_anterior = atual.custo
+        k = rng.randint(1, k_remocao_max)
+        removidos = rng.choice(operadores)(atual, k, vizinhos, rng)
+        # Só as rotas de onde saem e onde entram os removidos mudam
+        anteriores = {r: atual.rotas[r][:] for r in {atual.posicoes[c][0] for c in removidos}}
+        atual.remover_clientes(removidos)
+        insercao_regret(atual, removidos, k_regret)
+
+        custo = atual.custo
+        if aceitacao == "sa":
+            progresso = min(1.0, (time.time() - inicio) / tempo_limite)
+            temperatura = temperatura_inicial * (temperatura_final / temperatura_inicial) ** progresso
+            aceita = custo < custo_anterior - temperatura * math.log(rng.random() or 1e-300)
+        else:
+            aceita = custo < (1 + desvio) * melhor_custo
+        aceita = aceita and atual.valida()
+        melhorou = aceita and custo < melhor_custo
+        if melhorou:
+            melhor_solucao = atual.copiar_rotas()
+            melhor_custo = custo
+        if not aceita:
+            # Desfaz a iteração restaurando apenas as rotas tocadas; as que
+            # só receberam clientes voltam a ser elas sem os removidos
+            conjunto = set(removidos)
+            for cliente in removidos:
+                r = atual.posicoes[cliente][0]
+                if r not in anteriores:
+                    anteriores[r] = [c for c in atual.rotas[r] if c not in conjunto]
+            atual.restaurar_rotas(anteriores)
+        if rastro is not None:
+            rastro.registrar(iteracao, atual.custo, melhor_custo, len(removidos), melhorou)
+        if troca is not None:
+            elite = troca(melhor_custo, melhor_solucao)
+            if elite is not None:
+                atual = Solucao(elite, dados)
+                melhor_solucao = atual.copiar_rotas()
+                melhor_custo = atual.custo
+    if rastro is not None:
+        rastro.finalizar(iteracao, atual.custo, melhor_custo)
+    return melhor_solucao
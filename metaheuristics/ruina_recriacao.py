@@ -0,0 +1,170 @@
+
+# metaheuristics/ruina_recriacao.py
+
+import random
+import numpy as np
+from heuristics.insertion import melhores_insercoes
+from utils import vetor_demandas_por_id
+
+# Ruína e recriação sobre uma Solucao: retira k clientes e os reinsere, um a
+# um, na posição viável mais barata. Usada como perturbação (diversificação)
+# no lugar de recomeçar de uma solução trivial e como vizinhança da LNS
+# (metaheuristics/lns.py), com remoção aleatória, radial ou por strings e
+# reinserção gulosa ou por arrependimento (regret-k).
+
+ARREPENDIMENTO_INVIAVEL = 1e12  # peso de cada rota onde o cliente não cabe
+
+def melhor_insercao(solucao, cliente, candidatos=None):
+    """
+    Inserção viável mais barata do cliente fora das rotas.
+    - candidatos: listas de vizinhos próximos; se dadas, só são avaliadas as
+      posições ao lado dos vizinhos próximos (com varredura completa se
+      nenhuma delas couber)
+    Retorna (delta, rota, posição); se nenhuma rota comporta o cliente, a
+    rota é uma vazia (ou len(solucao.rotas), isto é, uma rota nova).
+    """
+    distancias = solucao.distancias
+    deposito = solucao.deposito
+    d_c = distancias[cliente]
+    folga = solucao.capacidade - solucao.demandas[cliente]
+    rotas = solucao.rotas
+    cargas = solucao.cargas
+    vazia = next((r for r, rota in enumerate(rotas) if not rota), len(rotas))
+    melhor = (d_c[deposito] + distancias[deposito][cliente], vazia, 0)
+
+    if candidatos is not None:
+        encontrou = False
+        for v in candidatos[cliente]:
+            posicao = solucao.posicoes.get(v)
+            if posicao is None or cargas[posicao[0]] > folga:
+                continue
+            j, p = posicao
+            rota = rotas[j]
+            for b in (p, p + 1):
+                anterior = rota[b - 1] if b > 0 else deposito
+                seguinte = rota[b] if b < len(rota) else deposito
+                delta = d_c[anterior] + d_c[seguinte] - distancias[anterior][seguinte]
+                encontrou = True
+                if delta < melhor[0]:
+                    melhor = (delta, j, b)
+        if encontrou:
+            return melhor
+
+    for j, rota in enumerate(rotas):
+        if not rota or cargas[j] > folga:
+            continue
+        anterior = deposito
+        for b, seguinte in enumerate(rota + [deposito]):
+            delta = d_c[anterior] + d_c[seguinte] - distancias[anterior][seguinte]
+            if delta < melhor[0]:
+                melhor = (delta, j, b)
+            anterior = seguinte
+    return melhor
+
+def remocao_aleatoria(solucao, k, rng=random):
+    """Sorteia k clientes (ou todos, se houver menos) para retirar."""
+    clientes = list(solucao.posicoes)
+    return rng.sample(clientes, min(k, len(clientes)))
+
+def remocao_radial(solucao, k, vizinhos, rng=random):
+    """
+    Sorteia um cliente semente e retira ele e seus vizinhos mais próximos,
+    até k clientes.
+    - vizinhos: listas de vizinhos próximos (calcular_vizinhos_proximos)
+    """
+    semente = rng.choice(list(solucao.posicoes))
+    return [semente] + vizinhos[semente][:k - 1]
+
+def remocao_strings(solucao, k, vizinhos, tamanho_max=10, rng=random):
+    """
+    Remoção por strings (SISR, Christiaens e Vanden Berghe, 2020): percorre
+    a semente e seus vizinhos mais próximos e, de cada rota ainda não
+    arruinada, retira uma sequência de clientes consecutivos que contém o
+    vizinho, com tamanho sorteado em [1, tamanho_max], até k clientes.
+    - vizinhos: listas de vizinhos próximos (calcular_vizinhos_proximos)
+    """
+    semente = rng.choice(list(solucao.posicoes))
+    arruinadas = set()
+    removidos = []
+    for cliente in [semente] + vizinhos[semente]:
+        if len(removidos) >= k:
+            break
+        r, p = solucao.posicoes[cliente]
+        if r in arruinadas:
+            continue
+        arruinadas.add(r)
+        rota = solucao.rotas[r]
+        tamanho = rng.randint(1, min(tamanho_max, len(rota), k - len(removidos)))
+        inicio = rng.randint(max(0, p - tamanho + 1), min(p, len(rota) - tamanho))
+        removidos += rota[inicio:inicio + tamanho]
+    return removidos
+
+def insercao_gulosa(solucao, clientes, candidatos=None):
+    """Reinsere os clientes, na ordem dada, cada um na posição mais barata (melhor_insercao)."""
+    for cliente in clientes:
+        _, r, p = melhor_insercao(solucao, cliente, candidatos)
+        solucao.inserir_cliente(cliente, r, p)
+
+def insercao_regret(solucao, clientes, k=2):
+    """
+    Reinsere os clientes por arrependimento (regret-k): a cada passo insere,
+    na sua posição mais barata, o cliente com maior soma das diferenças entre
+    a melhor inserção e as k - 1 seguintes (em rotas distintas; cada rota onde
+    o cliente não cabe pesa ARREPENDIMENTO_INVIAVEL). Com k = 1 é a inserção
+    mais barata. Os custos por rota vêm de melhores_insercoes
+    (heuristics/insertion.py) e só a rota que recebeu o cliente é reavaliada.
+    """
+    dados = solucao.dados
+    distancias = dados['distancias']
+    deposito = solucao.deposito
+    pendentes = np.array(clientes, dtype=np.int64)
+    demandas = vetor_demandas_por_id(dados)[pendentes]
+    ativos = np.ones(len(pendentes), dtype=bool)
+    # Uma coluna por índice de rota (as atuais e as que podem ser abertas) e,
+    # na última, o custo de abrir uma rota só para o cliente (sempre viável)
+    n_colunas = len(solucao.rotas) + len(pendentes)
+    custos = np.full((len(pendentes), n_colunas + 1), np.inf)
+    custos[:, -1] = distancias[deposito, pendentes] + distancias[pendentes, deposito]
+    posicoes = np.zeros((len(pendentes), n_colunas), dtype=np.int64)
+
+    def avaliar(r):
+        """Melhor inserção de cada cliente pendente na rota r (inf se não cabe)."""
+        custos[:, r] = np.inf
+        cabem = ativos & (demandas <= solucao.capacidade - solucao.cargas[r])
+        if cabem.any():
+            custos[cabem, r], posicoes[cabem, r] = melhores_insercoes(
+                distancias, solucao.rotas[r], deposito, pendentes[cabem])
+
+    for r, rota in enumerate(solucao.rotas):
+        if rota:
+            avaliar(r)
+    while ativos.any():
+        linhas = np.flatnonzero(ativos)
+        custos_linhas = custos[linhas]
+        ordenados = np.sort(custos_linhas, axis=1)
+        seguintes = ordenados[:, 1:k]
+        arrependimento = np.where(np.isinf(seguintes), ARREPENDIMENTO_INVIAVEL,
+                                  seguintes - ordenados[:, :1]).sum(axis=1)
+        # Maior arrependimento; empate resolvido pela inserção mais barata
+        escolhido = np.lexsort((ordenados[:, 0], -arrependimento))[0]
+        linha = linhas[escolhido]
+        r = int(np.argmin(custos_linhas[escolhido]))
+        if r == n_colunas:
+            r = next((r for r, rota in enumerate(solucao.rotas) if not rota), len(solucao.rotas))
+            p = 0
+        else:
+            p = int(posicoes[linha, r])
+        solucao.inserir_cliente(int(pendentes[linha]), r, p)
+        ativos[linha] = False
+        avaliar(r)
+
+def ruina_recriacao(solucao, k, candidatos=None, rng=random):
+    """
+    Perturba a Solucao no lugar: retira k clientes sorteados e os reinsere
+    em ordem aleatória por inserção gulosa.
+    Retorna os clientes reinseridos.
+    """
+    clientes = remocao_aleatoria(solucao, k, rng)
+    solucao.remover_clientes(clientes)
+    insercao_gulosa(solucao, clientes, candidatos)
+    return clientes
@@ -0,0 +1,198 @@
+
+# metaheuristics/rvnd.py
+
+import random
+import time
+from collections import deque
+from utils import solucao_valida
+
+# Busca local RVND (Randomized Variable Neighborhood Descent) sobre uma
+# Solucao: as vizinhanças são percorridas preguiçosamente (geradores) a partir
+# de um cliente, em ordem aleatória, e o primeiro movimento de melhora é
+# aplicado. Bits don't-look: um cliente só volta a ser examinado quando sua
+# rota é alterada, então clientes cujo entorno não mudou são pulados.
+# Os geradores produzem (movimento, delta); a capacidade só é verificada, em
+# O(1), para os movimentos que interessam, por solucao_valida(modo="local").
+
+EPSILON = 1e-9
+VIZINHANCAS_RVND = ("relocate", "swap", "2opt", "oropt", "2opt*")
+
+def _movimentos_relocate(s, c, candidatos):
+    """Insere c imediatamente antes ou depois de cada vizinho próximo em outra rota."""
+    distancias = s.distancias
+    deposito = s.deposito
+    i, a = s.posicoes[c]
+    rota_i = s.rotas[i]
+    d_c = distancias[c]
+    ant = rota_i[a - 1] if a > 0 else deposito
+    prox = rota_i[a + 1] if a + 1 < len(rota_i) else deposito
+    delta_remocao = distancias[ant][prox] - d_c[ant] - d_c[prox]
+    for v in candidatos[c]:
+        j, p = s.posicoes.get(v, (i, 0))
+        if j == i:
+            continue
+        rota_j = s.rotas[j]
+        for b in (p, p + 1):
+            anterior = rota_j[b - 1] if b > 0 else deposito
+            seguinte = rota_j[b] if b < len(rota_j) else deposito
+            delta = delta_remocao + d_c[anterior] + d_c[seguinte] - distancias[anterior][seguinte]
+            yield ("relocate", i, a, j, b), delta
+
+def _movimentos_swap(s, c, candidatos):
+    """Troca c com o antecessor ou o sucessor de cada vizinho próximo em outra rota."""
+    distancias = s.distancias
+    deposito = s.deposito
+    i, a = s.posicoes[c]
+    rota_i = s.rotas[i]
+    ant1 = rota_i[a - 1] if a > 0 else deposito
+    prox1 = rota_i[a + 1] if a + 1 < len(rota_i) else deposito
+    d_c = distancias[c]
+    d_ant1 = distancias[ant1]
+    d_prox1 = distancias[prox1]
+    remove1 = d_ant1[c] + d_prox1[c]
+    for v in candidatos[c]:
+        j, p = s.posicoes.get(v, (i, 0))
+        if j == i:
+            continue
+        rota_j = s.rotas[j]
+        n_j = len(rota_j)
+        for b in (p - 1, p + 1):
+            if b < 0 or b >= n_j:
+                continue
+            c2 = rota_j[b]
+            ant2 = rota_j[b - 1] if b > 0 else deposito
+            prox2 = rota_j[b + 1] if b + 1 < n_j else deposito
+            delta = (d_ant1[c2] + d_prox1[c2] - remove1 + d_c[ant2] + d_c[prox2] -
+                     distancias[ant2][c2] - distancias[prox2][c2])
+            yield ("swap", i, a, j, b), delta
+
+def _delta_2opt(distancias, rota, a, b, deposito):
+    """Variação de custo ao inverter rota[a:b]."""
+    ant = rota[a - 1] if a > 0 else deposito
+    prox = rota[b] if b < len(rota) else deposito
+    inicio, fim = rota[a], rota[b - 1]
+    return (distancias[ant][fim] + distancias[inicio][prox] -
+            distancias[ant][inicio] - distancias[fim][prox])
+
+def _movimentos_2opt(s, c, candidatos):
+    """Inverte o trecho da rota de c que torna c adjacente a um vizinho próximo na mesma rota."""
+    i, a = s.posicoes[c]
+    rota = s.rotas[i]
+    for v in candidatos[c]:
+        j, p = s.posicoes.get(v, (-1, 0))
+        if j != i:
+            continue
+        if p >= a + 2:
+            inicio, fim = a + 1, p + 1      # aresta (c, v)
+        elif p <= a - 2:
+            inicio, fim = p + 1, a + 1      # aresta (v, c)
+        else:
+            continue
+        yield ("2opt", i, inicio, fim), _delta_2opt(s.distancias, rota, inicio, fim, s.deposito)
+
+def _movimentos_oropt(s, c, candidatos, tamanho_max=3):
+    """
+    Move o segmento de 1 a tamanho_max clientes que começa em c para junto de
+    um vizinho próximo de c (na mesma rota ou em outra), com c adjacente a ele.
+    """
+    distancias = s.distancias
+    deposito = s.deposito
+    i, a = s.posicoes[c]
+    rota_i = s.rotas[i]
+    n_i = len(rota_i)
+    ant = rota_i[a - 1] if a > 0 else deposito
+    d_c = distancias[c]
+    for tamanho in range(1, min(tamanho_max, n_i - a) + 1):
+        fim = rota_i[a + tamanho - 1]
+        d_fim = distancias[fim]
+        prox = rota_i[a + tamanho] if a + tamanho < n_i else deposito
+        delta_remocao = distancias[ant][prox] - d_c[ant] - d_fim[prox]
+        for v in candidatos[c]:
+            j, p = s.posicoes.get(v, (None, 0))
+            if j is None:
+                continue
+            rota_j = s.rotas[j]
+            # Depois de v na ordem original, ou antes de v com o segmento invertido
+            for b, invertido in ((p + 1, False), (p, tamanho > 1)):
+                if j == i and a <= b <= a + tamanho:
+                    continue
+                anterior = rota_j[b - 1] if b > 0 else deposito
+                seguinte = rota_j[b] if b < len(rota_j) else deposito
+                if invertido:
+                    delta = d_fim[anterior] + d_c[seguinte]
+                else:
+                    delta = d_c[anterior] + d_fim[seguinte]
+                delta += delta_remocao - distancias[anterior][seguinte]
+                yield ("oropt", i, a, tamanho, j, b, invertido), delta
+
+def _movimentos_2opt_estrela(s, c, candidatos):
+    """Troca as caudas da rota de c e da rota de um vizinho próximo, criando a aresta (c, v) ou (v, c)."""
+    distancias = s.distancias
+    deposito = s.deposito
+    i, a = s.posicoes[c]
+    for v in candidatos[c]:
+        j, p = s.posicoes.get(v, (i, 0))
+        if j == i:
+            continue
+        rota_i, rota_j = s.rotas[i], s.rotas[j]
+        for corte_i, corte_j in ((a, p - 1), (a - 1, p)):
+            x = rota_i[corte_i] if corte_i >= 0 else deposito
+            x2 = rota_i[corte_i + 1] if corte_i + 1 < len(rota_i) else deposito
+            y = rota_j[corte_j] if corte_j >= 0 else deposito
+            y2 = rota_j[corte_j + 1] if corte_j + 1 < len(rota_j) else deposito
+            delta = distancias[x][y2] + distancias[y][x2] - distancias[x][x2] - distancias[y][y2]
+            yield ("2opt*", i, corte_i, j, corte_j), delta
+
+GERADORES = {
+    "relocate": _movimentos_relocate,
+    "swap": _movimentos_swap,
+    "2opt": _movimentos_2opt,
+    "oropt": _movimentos_oropt,
+    "2opt*": _movimentos_2opt_estrela,
+}
+
+def rvnd(solucao, candidatos, vizinhancas=VIZINHANCAS_RVND, rng=random, prazo=None):
+    """
+    Aplica a RVND com primeira melhora e bits don't-look à Solucao, no lugar,
+    até um ótimo local de todas as vizinhanças (ou até o prazo).
+    - candidatos: listas de vizinhos próximos (calcular_vizinhos_proximos)
+    - vizinhancas: nomes das vizinhanças (chaves de GERADORES)
+    - prazo: instante (time.time()) a partir do qual a busca é interrompida
+    Retorna o número de movimentos avaliados.
+    """
+    geradores = [GERADORES[nome] for nome in vizinhancas]
+    rotas = solucao.rotas
+    dados = solucao.dados
+    cargas = solucao.cargas
+    acumuladas = solucao.cargas_acumuladas
+    clientes = list(solucao.posicoes)
+    rng.shuffle(clientes)
+    fila = deque(clientes)
+    na_fila = dict.fromkeys(clientes, True)
+    avaliados = 0
+    while fila:
+        if prazo is not None and time.time() >= prazo:
+            break
+        c = fila.popleft()
+        na_fila[c] = False
+        ordem = geradores[:]
+        rng.shuffle(ordem)
+        movimento = None
+        for gerador in ordem:
+            for candidato, delta in gerador(solucao, c, candidatos):
+                avaliados += 1
+                if delta < -EPSILON and solucao_valida(rotas, dados, "local", candidato,
+                                                       cargas, acumuladas):
+                    movimento = candidato
+                    break
+            if movimento is not None:
+                break
+        if movimento is None:
+            continue  # bit don't-look de c fica ligado até sua rota mudar
+        # Religa os clientes das rotas alteradas (inclusive c)
+        for r in solucao.aplicar(movimento):
+            for cliente in solucao.rotas[r]:
+                if not na_fila[cliente]:
+                    na_fila[cliente] = True
+                    fila.append(cliente)
+    return avaliados
@@ -3,14 +3,79 @@
 
 import random
 import time
-from utils import (
-    calcular_custo_total,
-    gerar_solucao_inicial,
-    vizinhanca_swap,
-    vizinhanca_relocate,
-    vizinhanca_2opt,
-    solucao_valida
-)
+from heuristics import HEURISTICAS
+from solucao import Solucao
+from metaheuristics.rvnd import GERADORES, rvnd
+from metaheuristics.ruina_recriacao import ruina_recriacao
+from utils import calcular_vizinhos_proximos, gerar_solucao_inicial, solucao_valida
+
+class MemoriaTabu:
+    """
+    Memória tabu baseada em atributos, com consulta O(1).
+    Ao mover um cliente da rota origem para a rota destino, o atributo
+    (cliente, origem) fica tabu até a iteração de expiração, isto é, o cliente
+    não pode voltar para a rota de onde saiu. A duração (tenure) é sorteada a
+    cada registro em [tenure_min, tenure_max].
+    """
+    __slots__ = ("expiracao", "tenure_min", "tenure_max", "rng")
+
+    def __init__(self, tenure_min, tenure_max, rng=random):
+        self.expiracao = {}
+        self.tenure_min = tenure_min
+        self.tenure_max = tenure_max
+        self.rng = rng
+
+    def registrar(self, atributo, iteracao):
+        self.expiracao[atributo] = iteracao + self.rng.randint(self.tenure_min, self.tenure_max)
+        # Descarta atributos expirados para o dicionário não crescer indefinidamente
+        if len(self.expiracao) > 64 * self.tenure_max:
+            self.expiracao = {a: it for a, it in self.expiracao.items() if it > iteracao}
+
+    def eh_tabu(self, atributo, iteracao):
+        return self.expiracao.get(atributo, -1) > iteracao
+
+    def limpar(self):
+        self.expiracao.clear()
+
+def atributos_movimento(movimento, rotas):
+    """
+    Retorna (proibidos, registrados) de um movimento:
+    - proibidos: atributos que tornam o movimento tabu, se estiverem na memória
+    - registrados: atributos a registrar na memória quando o movimento é aplicado
+    """
+    tipo = movimento[0]
+    if tipo == "relocate":
+        _, i, a, j, _ = movimento
+        cliente = rotas[i][a]
+        return ((cliente, j),), ((cliente, i),)
+    if tipo == "swap":
+        _, i, a, j, b = movimento
+        c1, c2 = rotas[i][a], rotas[j][b]
+        return ((c1, j), (c2, i)), ((c1, i), (c2, j))
+    if tipo == "oropt":
+        _, i, a, tamanho, j, _, _ = movimento
+        segmento = rotas[i][a:a + tamanho]
+        if i == j:
+            # Dentro da rota: proíbe mover de novo o segmento com os mesmos extremos
+            atributo = ("oropt", min(segmento[0], segmento[-1]), max(segmento[0], segmento[-1]))
+            return (atributo,), (atributo,)
+        return tuple((c, j) for c in segmento), tuple((c, i) for c in segmento)
+    if tipo == "2opt*":
+        # O primeiro cliente de cada cauda troca de rota
+        _, i, a, j, b = movimento
+        proibidos, registrados = [], []
+        if a + 1 < len(rotas[i]):
+            proibidos.append((rotas[i][a + 1], j))
+            registrados.append((rotas[i][a + 1], i))
+        if b + 1 < len(rotas[j]):
+            proibidos.append((rotas[j][b + 1], i))
+            registrados.append((rotas[j][b + 1], j))
+        return tuple(proibidos), tuple(registrados)
+    # 2-opt: proíbe desfazer a inversão do mesmo segmento (mesmos extremos)
+    _, i, a, b = movimento
+    c1, c2 = rotas[i][a], rotas[i][b - 1]
+    atributo = ("2opt", min(c1, c2), max(c1, c2))
+    return (atributo,), (atributo,)
 
 def tabu_search(
     dados,
@@ -18,72 +83,161 @@ def tabu_search(
     intensificacao=True,
     diversificacao=True,
     tamanho_tabu=5,
-    max_iter_sem_melhora=1
+    max_iter_sem_melhora=None,
+    granular=False,
+    k_vizinhos=30,
+    rastro=None,
+    vizinhancas=None,
+    solucao_inicial=None,
+    k_perturbacao=None,
+    troca=None
 ):
     """
     Tabu Search para o CVRP.
     - dados: dicionário com informações da instância (coordenadas, demandas, capacidade, etc)
     - tempo_limite: tempo máximo de execução (segundos)
-    - intensificacao: ativa busca local agressiva
-    - diversificacao: ativa reinicializações periódicas
-    - tamanho_tabu: tamanho da lista tabu
-    - max_iter_sem_melhora: critério de parada secundário
+    - intensificacao: aplica a busca local RVND (metaheuristics/rvnd.py) à
+      solução inicial, após cada reinicialização e a cada nova melhor solução
+    - diversificacao: quando não há movimento admissível, perturba a solução
+      corrente por ruína e recriação de k_perturbacao clientes; após
+      max_iter_sem_melhora iterações sem melhora, perturba a melhor solução
+    - tamanho_tabu: tenure mínimo; o tenure de cada atributo é sorteado em
+      [tamanho_tabu, 2 * tamanho_tabu]
+    - max_iter_sem_melhora: iterações sem melhorar a melhor solução que
+      disparam a diversificação ou, sem ela, encerram a busca; se None, a
+      busca só para no tempo_limite (ou sem movimento admissível)
+    - granular: restringe os movimentos aos k vizinhos mais próximos de cada
+      cliente; sem ele, cada cliente é combinado com todos os demais
+    - k_vizinhos: tamanho da lista de candidatos no modo granular
+    - vizinhancas: nomes das vizinhanças usadas (chaves de GERADORES em
+      metaheuristics/rvnd.py: swap, relocate, 2opt, oropt, 2opt*); se None,
+      swap e relocate
+    - solucao_inicial: lista de rotas, nome de uma heurística construtiva
+      (chave de HEURISTICAS) ou None (cada cliente em uma rota)
+    - k_perturbacao: clientes retirados e reinseridos na diversificação; se
+      None, 10% dos clientes (no mínimo 1)
+    - rastro: Rastro (rastro.py) opcional que recebe o perfil de convergência
+      (a cada melhora e em amostras periódicas)
+    - troca: função opcional (melhor_custo, melhor_solucao) -> rotas ou None,
+      chamada ao fim de cada iteração (troca de elite do modelo de ilhas); se
+      devolve uma solução melhor, a busca continua a partir dela com a
+      memória tabu limpa (os atributos guardam índices de rota)
     Retorna a melhor solução encontrada (lista de rotas).
     """
     inicio = time.time()
-    melhor_solucao = gerar_solucao_inicial(dados)
-    melhor_custo = calcular_custo_total(melhor_solucao, dados)
-    solucao_atual = [rota[:] for rota in melhor_solucao]
-    custo_atual = melhor_custo
+    prazo = inicio + tempo_limite
+    if rastro is not None:
+        rastro.iniciar()
+    # Os geradores das vizinhanças partem de listas de candidatos por cliente:
+    # os k mais próximos (granular) ou todos os clientes, do mais próximo ao
+    # mais distante. A RVND usa sempre as listas granulares.
+    candidatos_rvnd = calcular_vizinhos_proximos(dados, k_vizinhos)
+    candidatos = (candidatos_rvnd if granular else
+                  calcular_vizinhos_proximos(dados, dados['n_clientes'] - 1))
+
+    if solucao_inicial is None:
+        solucao_inicial = gerar_solucao_inicial(dados)
+    elif isinstance(solucao_inicial, str):
+        if solucao_inicial not in HEURISTICAS:
+            raise ValueError(f"Heurística desconhecida: {solucao_inicial}")
+        solucao_inicial = HEURISTICAS[solucao_inicial](dados)
+    if k_perturbacao is None:
+        k_perturbacao = max(1, dados['n_clientes'] // 10)
+
+    # Estado incremental da solução corrente (cargas, custos e posições em cache)
+    atual = Solucao(solucao_inicial, dados)
+    avaliados = rvnd(atual, candidatos_rvnd, prazo=prazo) if intensificacao else 0
+    melhor_solucao = atual.copiar_rotas()
+    melhor_custo = atual.custo
 
-    lista_tabu = []
+    if vizinhancas is None:
+        vizinhancas = ("swap", "relocate")
+    desconhecidas = [nome for nome in vizinhancas if nome not in GERADORES]
+    if desconhecidas:
+        raise ValueError(f"Vizinhanças desconhecidas: {desconhecidas}")
+    geradores = [GERADORES[nome] for nome in vizinhancas]
+
+    memoria_tabu = MemoriaTabu(tamanho_tabu, 2 * tamanho_tabu)
     iter_sem_melhora = 0
     iter_total = 0
+    if rastro is not None:
+        rastro.registrar(iter_total, atual.custo, melhor_custo, avaliados, melhorou=True)
 
-    while (time.time() - inicio) < tempo_limite and iter_sem_melhora < max_iter_sem_melhora:
-        vizinhos = []
-        # Geração de vizinhança: swap, relocate, 2-opt
-        vizinhos += vizinhanca_swap(solucao_atual, dados)
-        vizinhos += vizinhanca_relocate(solucao_atual, dados)
-        if intensificacao:
-            vizinhos += vizinhanca_2opt(solucao_atual, dados)
-        # Avalia vizinhos e aplica lista tabu
-        melhor_vizinho = None
-        melhor_vizinho_custo = float('inf')
+    while time.time() < prazo:
+        # Melhor movimento admissível: os geradores de cada cliente são
+        # consumidos um a um (O(1) de memória por iteração), sem montar a
+        # lista de vizinhos, com a memória tabu e o critério de aspiração.
+        # Após max_iter_sem_melhora iterações sem melhora, a diversificação
+        # recomeça da melhor solução; sem ela, a busca termina.
+        estagnada = max_iter_sem_melhora is not None and iter_sem_melhora >= max_iter_sem_melhora
+        if estagnada and not diversificacao:
+            break
         movimento_escolhido = None
-        for vizinho, movimento in vizinhos:
-            if movimento in lista_tabu:
-                continue
-            if not solucao_valida(vizinho, dados):
-                continue
-            custo = calcular_custo_total(vizinho, dados)
-            if custo < melhor_vizinho_custo:
-                melhor_vizinho = vizinho
-                melhor_vizinho_custo = custo
-                movimento_escolhido = movimento
-        # Se não encontrou vizinho válido, faz diversificação (se ativada)
-        if melhor_vizinho is None:
-            if diversificacao:
-                solucao_atual = gerar_solucao_inicial(dados)
-                custo_atual = calcular_custo_total(solucao_atual, dados)
-                lista_tabu = []
-                iter_sem_melhora += 1
-                iter_total += 1
-                continue
-            else:
+        avaliados = 0
+        if estagnada:
+            # Estagnação: a perturbação parte da melhor solução encontrada
+            atual = Solucao(melhor_solucao, dados)
+        else:
+            custo_atual = atual.custo
+            melhor_delta = float('inf')
+            for c in atual.posicoes:
+                if time.time() >= prazo:
+                    break  # a iteração termina com o melhor movimento já avaliado
+                for gerador in geradores:
+                    for movimento, delta in gerador(atual, c, candidatos):
+                        avaliados += 1
+                        if delta >= melhor_delta:
+                            continue
+                        # Capacidade só das rotas alteradas, em O(1)
+                        if not solucao_valida(atual.rotas, dados, "local", movimento,
+                                              atual.cargas, atual.cargas_acumuladas):
+                            continue
+                        if custo_atual + delta >= melhor_custo:
+                            proibidos, _ = atributos_movimento(movimento, atual.rotas)
+                            if any(memoria_tabu.eh_tabu(atributo, iter_total) for atributo in proibidos):
+                                continue
+                        melhor_delta = delta
+                        movimento_escolhido = movimento
+        # Sem vizinho admissível ou estagnada: diversificação (se ativada)
+        if movimento_escolhido is None:
+            if not diversificacao or time.time() >= prazo:
                 break
-        # Atualiza solução atual
-        solucao_atual = [rota[:] for rota in melhor_vizinho]
-        custo_atual = melhor_vizinho_custo
-        lista_tabu.append(movimento_escolhido)
-        if len(lista_tabu) > tamanho_tabu:
-            lista_tabu.pop(0)
+            ruina_recriacao(atual, k_perturbacao, candidatos_rvnd)
+            memoria_tabu.limpar()
+            iter_sem_melhora = 0
+            if intensificacao:
+                avaliados += rvnd(atual, candidatos_rvnd, prazo=prazo)
+        else:
+            # Aplica no lugar apenas o movimento escolhido. Rotas vazias são
+            # mantidas durante a busca para que os índices de rota dos
+            # atributos tabu continuem válidos.
+            _, registrados = atributos_movimento(movimento_escolhido, atual.rotas)
+            for atributo in registrados:
+                memoria_tabu.registrar(atributo, iter_total)
+            atual.aplicar(movimento_escolhido)
+            # Intensificação: desce com a RVND a partir de cada nova melhor solução
+            if intensificacao and atual.custo < melhor_custo:
+                avaliados += rvnd(atual, candidatos_rvnd, prazo=prazo)
+        custo_atual = atual.custo
         # Atualiza melhor solução
-        if custo_atual < melhor_custo:
-            melhor_solucao = [rota[:] for rota in solucao_atual]
+        melhorou = custo_atual < melhor_custo
+        if melhorou:
+            melhor_solucao = atual.copiar_rotas()
             melhor_custo = custo_atual
             iter_sem_melhora = 0
         else:
             iter_sem_melhora += 1
         iter_total += 1
+        if rastro is not None:
+            rastro.registrar(iter_total, custo_atual, melhor_custo, avaliados, melhorou)
+        if troca is not None:
+            elite = troca(melhor_custo, melhor_solucao)
+            if elite is not None:
+                atual = Solucao(elite, dados)
+                melhor_solucao = atual.copiar_rotas()
+                melhor_custo = atual.custo
+                memoria_tabu.limpar()
+                iter_sem_melhora = 0
+    if rastro is not None:
+        rastro.finalizar(iter_total, atual.custo, melhor_custo)
     return melhor_solucao
@@ -1,69 +1,206 @@
 
 # parser.py
 
-def ler_instancia_cvrp(caminho_arquivo):
+import os
+import numpy as np
+from instancia import Instancia
+
+SECOES = ("NODE_COORD_SECTION", "DEMAND_SECTION", "DEPOT_SECTION",
+          "EDGE_WEIGHT_SECTION", "DISPLAY_DATA_SECTION")
+TIPOS_SUPORTADOS = ("EUC_2D", "EXPLICIT")
+VERSAO_CACHE = 1
+
+def ler_instancia_cvrp(caminho_arquivo, arredondar=False, usar_cache=True):
     """
     Lê uma instância CVRP no formato padrão (exemplo: X-n101-k25).
-    Retorna um dicionário com coordenadas, demandas, capacidade, depósito, n_clientes.
+    Retorna uma Instancia (arrays contíguos de coordenadas e demandas), que
+    também funciona como o dicionário com coordenadas, demandas, capacidade,
+    depósito, n_clientes e a matriz de distâncias (indexada pelo id do nó).
+    - arredondar: usa o arredondamento EUC_2D do TSPLIB nas distâncias
+    - usar_cache: lê/grava um cache .npz ao lado do arquivo (invalidado quando
+      o arquivo muda), para que execuções repetidas não precisem reprocessá-lo
+    """
+    caminho_cache = caminho_arquivo + ".npz"
+    campos = None
+    if usar_cache:
+        campos = ler_cache(caminho_arquivo, caminho_cache)
+    if campos is None:
+        campos = interpretar_arquivo(caminho_arquivo)
+        if usar_cache:
+            gravar_cache(caminho_arquivo, caminho_cache, campos)
+    return Instancia(arredondar=arredondar, nome=os.path.basename(caminho_arquivo), **campos)
+
+def interpretar_arquivo(caminho_arquivo):
+    """
+    Lê o arquivo TSPLIB/CVRPLIB em uma passada: o cabeçalho linha a linha e
+    cada seção como um bloco de números convertido de uma vez pelo NumPy.
+    Valida DIMENSION contra o que foi lido.
+    Retorna os campos para construir a Instancia.
     """
+    cabecalho = {}
+    blocos = {}
+    secao = None
     with open(caminho_arquivo, 'r') as f:
-        linhas = f.readlines()
+        for linha in f:
+            linha = linha.strip()
+            if not linha:
+                continue
+            palavra = linha.split(None, 1)[0].rstrip(":")
+            if palavra == "EOF":
+                break
+            if palavra in SECOES:
+                secao = palavra
+                blocos[secao] = []
+                continue
+            if secao is not None and not linha[0].isalpha():
+                blocos[secao].append(linha)
+                continue
+            # Linha de cabeçalho "CHAVE : valor"
+            secao = None
+            chave, _, valor = linha.partition(":")
+            cabecalho[chave.strip()] = valor.strip().strip('"')
 
-    coordenadas = {}
-    demandas = {}
-    capacidade = None
-    deposito = None
-    n_clientes = None
+    numeros = {secao: np.fromstring(" ".join(linhas), sep=" ") for secao, linhas in blocos.items()}
 
-    secao = None
-    for linha in linhas:
-        linha = linha.strip()
-        if linha.startswith("CAPACITY"):
-            capacidade = int(linha.split(":")[1].strip())
-        elif linha.startswith("DIMENSION"):
-            n_clientes = int(linha.split(":")[1].strip()) - 1  # exclui depósito
-        elif linha.startswith("NODE_COORD_SECTION"):
-            secao = "COORD"
-            continue
-        elif linha.startswith("DEMAND_SECTION"):
-            secao = "DEMAND"
-            continue
-        elif linha.startswith("DEPOT_SECTION"):
-            secao = "DEPOT"
-            continue
-        elif linha.startswith("EOF"):
-            break
-        elif secao == "COORD":
-            partes = linha.split()
-            if len(partes) == 3:
-                idx = int(partes[0])
-                x = float(partes[1])
-                y = float(partes[2])
-                coordenadas[idx] = (x, y)
-        elif secao == "DEMAND":
-            partes = linha.split()
-            if len(partes) == 2:
-                idx = int(partes[0])
-                demanda = int(partes[1])
-                demandas[idx] = demanda
-        elif secao == "DEPOT":
-            if linha == "-1":
-                secao = None
-            else:
-                deposito = int(linha)
+    dimensao = int(cabecalho["DIMENSION"]) if "DIMENSION" in cabecalho else None
+    capacidade = int(cabecalho["CAPACITY"]) if "CAPACITY" in cabecalho else None
+    tipo = cabecalho.get("EDGE_WEIGHT_TYPE", "EUC_2D")
+    if tipo not in TIPOS_SUPORTADOS:
+        raise ValueError(f"{caminho_arquivo}: EDGE_WEIGHT_TYPE não suportado: {tipo}")
+
+    coordenadas = None
+    secao_coord = "NODE_COORD_SECTION" if "NODE_COORD_SECTION" in numeros else "DISPLAY_DATA_SECTION"
+    if secao_coord in numeros:
+        tabela = numeros[secao_coord].reshape(-1, 3)
+        ids = tabela[:, 0].astype(np.int64)
+        coordenadas = tabela[:, 1:]
+        ordem = np.argsort(ids, kind="stable")
+        ids, coordenadas = ids[ordem], coordenadas[ordem]
+    elif dimensao is not None:
+        ids = np.arange(1, dimensao + 1, dtype=np.int64)
+    else:
+        raise ValueError(f"{caminho_arquivo}: sem coordenadas e sem DIMENSION")
+    if tipo == "EUC_2D" and coordenadas is None:
+        raise ValueError(f"{caminho_arquivo}: EUC_2D exige NODE_COORD_SECTION")
+    if dimensao is not None and len(ids) != dimensao:
+        raise ValueError(f"{caminho_arquivo}: DIMENSION={dimensao}, mas {len(ids)} nós lidos")
+    if len(np.unique(ids)) != len(ids):
+        raise ValueError(f"{caminho_arquivo}: ids de nós repetidos")
+    posicao = {int(i): k for k, i in enumerate(ids)}
+
+    demandas = np.zeros(len(ids), dtype=np.int64)
+    if "DEMAND_SECTION" in numeros:
+        tabela = numeros["DEMAND_SECTION"].reshape(-1, 2).astype(np.int64)
+        if dimensao is not None and len(tabela) != dimensao:
+            raise ValueError(f"{caminho_arquivo}: DIMENSION={dimensao}, mas {len(tabela)} demandas lidas")
+        try:
+            demandas[[posicao[int(i)] for i in tabela[:, 0]]] = tabela[:, 1]
+        except KeyError as erro:
+            raise ValueError(f"{caminho_arquivo}: demanda para nó inexistente {erro}") from None
 
-    # Se depósito não foi identificado, assume 1
-    if deposito is None:
-        deposito = 1
+    # Lista de depósitos terminada por -1; se não identificado, assume 1
+    depositos = [int(i) for i in numeros.get("DEPOT_SECTION", np.empty(0)) if i != -1]
+    if not depositos:
+        depositos = [1]
 
-    # Se n_clientes não foi identificado, calcula pelo número de coordenadas menos depósito
-    if n_clientes is None:
-        n_clientes = len(coordenadas) - 1
+    pesos = None
+    if tipo == "EXPLICIT":
+        formato = cabecalho.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX")
+        pesos = montar_matriz_explicita(numeros.get("EDGE_WEIGHT_SECTION", np.empty(0)),
+                                        len(ids), formato, caminho_arquivo)
+        if coordenadas is None:
+            coordenadas = np.full((len(ids), 2), np.nan)
 
     return {
-        "coordenadas": coordenadas,   # dict: idx -> (x, y)
-        "demandas": demandas,         # dict: idx -> demanda
-        "capacidade": capacidade,     # int
-        "deposito": deposito,         # int
-        "n_clientes": n_clientes      # int (exclui depósito)
+        "ids": ids,
+        "coordenadas": coordenadas,
+        "demandas": demandas,
+        "capacidade": capacidade,
+        "deposito": depositos[0],
+        "depositos": depositos,
+        # Exclui os depósitos (com um depósito, DIMENSION - 1)
+        "n_clientes": len(ids) - len(depositos),
+        "pesos": pesos,
     }
+
+def montar_matriz_explicita(valores, n, formato, caminho_arquivo=""):
+    """
+    Monta a matriz n x n (na ordem densa dos nós) a partir dos valores da
+    EDGE_WEIGHT_SECTION, conforme o EDGE_WEIGHT_FORMAT do TSPLIB.
+    """
+    # Formatos por coluna equivalem ao formato por linha do triângulo oposto
+    equivalentes = {"UPPER_COL": "LOWER_ROW", "LOWER_COL": "UPPER_ROW",
+                    "UPPER_DIAG_COL": "LOWER_DIAG_ROW", "LOWER_DIAG_COL": "UPPER_DIAG_ROW"}
+    formato = equivalentes.get(formato, formato)
+    if formato == "FULL_MATRIX":
+        esperado = n * n
+        indices = None
+    elif formato == "UPPER_ROW":
+        indices = np.triu_indices(n, 1)
+    elif formato == "LOWER_ROW":
+        indices = np.tril_indices(n, -1)
+    elif formato == "UPPER_DIAG_ROW":
+        indices = np.triu_indices(n, 0)
+    elif formato == "LOWER_DIAG_ROW":
+        indices = np.tril_indices(n, 0)
+    else:
+        raise ValueError(f"{caminho_arquivo}: EDGE_WEIGHT_FORMAT não suportado: {formato}")
+    if indices is not None:
+        esperado = len(indices[0])
+    if len(valores) != esperado:
+        raise ValueError(f"{caminho_arquivo}: EDGE_WEIGHT_SECTION com {len(valores)} valores, "
+                         f"esperados {esperado} para DIMENSION={n} ({formato})")
+    if indices is None:
+        return valores.reshape(n, n).astype(np.float64)
+    matriz = np.zeros((n, n))
+    matriz[indices] = valores
+    matriz[indices[1], indices[0]] = valores
+    return matriz
+
+def ler_cache(caminho_arquivo, caminho_cache):
+    """
+    Retorna os campos gravados no cache .npz, ou None se ele não existir ou
+    estiver desatualizado em relação ao arquivo da instância.
+    """
+    try:
+        estado = os.stat(caminho_arquivo)
+        with np.load(caminho_cache, allow_pickle=False) as cache:
+            if (int(cache["versao"]) != VERSAO_CACHE or
+                    int(cache["mtime_ns"]) != estado.st_mtime_ns or
+                    int(cache["tamanho"]) != estado.st_size):
+                return None
+            return {
+                "ids": cache["ids"],
+                "coordenadas": cache["coordenadas"],
+                "demandas": cache["demandas"],
+                "capacidade": int(cache["capacidade"]),
+                "deposito": int(cache["depositos"][0]),
+                "depositos": cache["depositos"].tolist(),
+                "n_clientes": int(cache["n_clientes"]),
+                "pesos": cache["pesos"] if cache["pesos"].size else None,
+            }
+    except (OSError, KeyError, ValueError):
+        return None
+
+def gravar_cache(caminho_arquivo, caminho_cache, campos):
+    """
+    Grava os campos da instância em .npz; falhas de escrita são ignoradas
+    (o cache é apenas uma otimização).
+    """
+    estado = os.stat(caminho_arquivo)
+    temporario = caminho_cache + ".tmp.npz"
+    try:
+        np.savez(temporario,
+                 versao=VERSAO_CACHE,
+                 mtime_ns=estado.st_mtime_ns,
+                 tamanho=estado.st_size,
+                 ids=campos["ids"],
+                 coordenadas=campos["coordenadas"],
+                 demandas=campos["demandas"],
+                 capacidade=campos["capacidade"] if campos["capacidade"] is not None else -1,
+                 depositos=np.array(campos["depositos"], dtype=np.int64),
+                 n_clientes=campos["n_clientes"],
+                 pesos=campos["pesos"] if campos["pesos"] is not None else np.empty(0))
+        os.replace(temporario, caminho_cache)
+    except OSError:
+        pass
@@ -0,0 +1,68 @@
+
+# perfil.py
+
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+class Perfil:
+    """
+    Perfil opcional de uma execução de heurística: tempo acumulado por fase,
+    contadores (avaliações de distância, checagens de viabilidade) e pico de
+    memória alocada (tracemalloc, que também contabiliza os arrays do NumPy).
+    O tracemalloc deixa as alocações mais lentas, então os tempos das fases
+    com perfil ativo servem para comparação entre fases, não com execuções
+    sem perfil.
+    """
+    __slots__ = ("fases", "contadores", "pico_memoria", "_iniciou_tracemalloc")
+
+    def __init__(self):
+        self.fases = {}
+        self.contadores = {"distancias": 0, "viabilidade": 0}
+        self.pico_memoria = 0
+        self._iniciou_tracemalloc = False
+
+    def iniciar(self):
+        """Começa a medir o pico de memória a partir deste ponto."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+        tracemalloc.reset_peak()
+
+    def finalizar(self):
+        _, self.pico_memoria = tracemalloc.get_traced_memory()
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+
+    @contextmanager
+    def fase(self, nome):
+        """Acumula o tempo do bloco na fase `nome`."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[nome] = self.fases.get(nome, 0.0) + time.perf_counter() - inicio
+
+    def contar(self, contador, quantidade=1):
+        self.contadores[contador] = self.contadores.get(contador, 0) + quantidade
+
+    def colunas(self):
+        """Retorna as colunas extras do resultado (dict nome -> valor)."""
+        colunas = {f"Tempo {nome} (s)": round(t, 4) for nome, t in self.fases.items()}
+        colunas["Avaliacoes de distancia"] = self.contadores["distancias"]
+        colunas["Checagens de viabilidade"] = self.contadores["viabilidade"]
+        colunas["Pico de memoria (MB)"] = round(self.pico_memoria / 2 ** 20, 3)
+        return colunas
+
+class PerfilInativo:
+    """Perfil nulo usado quando o perfil não é pedido: não mede nada."""
+    __slots__ = ()
+
+    def fase(self, nome):
+        return nullcontext()
+
+    def contar(self, contador, quantidade=1):
+        pass
+
+PERFIL_INATIVO = PerfilInativo()
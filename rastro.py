@@ -0,0 +1,84 @@
+
+# rastro.py
+
+import os
+import time
+import numpy as np
+
+# Colunas gravadas por ponto do rastro (perfil anytime de uma execução)
+COLUNAS_RASTRO = ("tempo", "iteracao", "custo_atual", "melhor_custo", "vizinhanca",
+                  "movimentos_por_s", "melhora")
+INTERVALO_AMOSTRA = 1.0  # segundos entre amostras periódicas
+
+class Rastro:
+    """
+    Registro de convergência de uma execução de metaheurística: um ponto a
+    cada melhora da melhor solução e uma amostra a cada `intervalo` segundos.
+    Cada ponto guarda (tempo decorrido, iteração, custo atual, melhor custo,
+    tamanho da vizinhança, movimentos avaliados por segundo, melhora).
+    O custo por iteração é uma soma e uma comparação; os pontos ficam em
+    listas e só são convertidos em arrays ao gravar.
+    """
+    __slots__ = ("intervalo", "inicio", "proxima_amostra", "movimentos", "movimentos_marca",
+                 "tempo_marca", "pontos")
+
+    def __init__(self, intervalo=INTERVALO_AMOSTRA):
+        self.intervalo = intervalo
+        self.iniciar()
+
+    def iniciar(self):
+        """Zera o rastro e marca o início da execução."""
+        self.inicio = time.time()
+        self.proxima_amostra = self.intervalo
+        self.movimentos = 0
+        self.movimentos_marca = 0
+        self.tempo_marca = 0.0
+        self.pontos = []
+
+    def registrar(self, iteracao, custo_atual, melhor_custo, vizinhanca, melhorou=False):
+        """
+        Chamado uma vez por iteração com o tamanho da vizinhança avaliada;
+        grava um ponto se a melhor solução melhorou ou se o intervalo de
+        amostragem passou.
+        """
+        self.movimentos += vizinhanca
+        decorrido = time.time() - self.inicio
+        if not melhorou and decorrido < self.proxima_amostra:
+            return
+        if decorrido >= self.proxima_amostra:
+            self.proxima_amostra = (decorrido // self.intervalo + 1) * self.intervalo
+        self._ponto(decorrido, iteracao, custo_atual, melhor_custo, vizinhanca, melhorou)
+
+    def finalizar(self, iteracao, custo_atual, melhor_custo):
+        """
+        Grava sempre o ponto final da execução (vizinhança 0), para que o
+        rastro termine no instante em que a busca parou.
+        """
+        self._ponto(time.time() - self.inicio, iteracao, custo_atual, melhor_custo, 0, False)
+
+    def _ponto(self, decorrido, iteracao, custo_atual, melhor_custo, vizinhanca, melhorou):
+        janela = decorrido - self.tempo_marca
+        taxa = (self.movimentos - self.movimentos_marca) / janela if janela > 0 else 0.0
+        self.movimentos_marca = self.movimentos
+        self.tempo_marca = decorrido
+        self.pontos.append((decorrido, iteracao, custo_atual, melhor_custo, vizinhanca,
+                            taxa, melhorou))
+
+    def como_arrays(self):
+        """Retorna dict coluna -> array (float64; iteração, vizinhança e melhora inteiros)."""
+        colunas = list(zip(*self.pontos)) if self.pontos else [()] * len(COLUNAS_RASTRO)
+        tipos = (np.float64, np.int64, np.float64, np.float64, np.int64, np.float64, np.int8)
+        return {nome: np.array(valores, dtype=tipo)
+                for nome, valores, tipo in zip(COLUNAS_RASTRO, colunas, tipos)}
+
+    def gravar(self, caminho):
+        """Grava o rastro em um .npz comprimido (uma coluna por array)."""
+        pasta = os.path.dirname(caminho)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        np.savez_compressed(caminho, **self.como_arrays())
+
+def ler_rastro(caminho):
+    """Lê um rastro gravado por Rastro.gravar como dict coluna -> array."""
+    with np.load(caminho) as arquivo:
+        return {nome: arquivo[nome] for nome in COLUNAS_RASTRO}
@@ -0,0 +1,146 @@
+
+# solucao.py
+
+from utils import ids_clientes, mascara_clientes, matriz_distancias_lista, rotas_apos_movimento
+
+class Solucao:
+    """
+    Estado incremental de uma solução do CVRP.
+    Para cada rota r guarda a carga, as cargas acumuladas
+    (cargas_acumuladas[r][k] = carga dos k primeiros clientes), o custo e as
+    distâncias acumuladas (prefixos[r][k] = distância percorrida do depósito
+    até o k-ésimo nó da rota estendida [depósito] + rota + [depósito], logo
+    prefixos[r][-1] é o custo da rota), além do índice cliente -> (rota, posição).
+    Os movimentos das vizinhanças são aplicados no lugar e só recalculam as
+    rotas afetadas, em O(tamanho da rota). Rotas que ficam vazias são
+    mantidas, para que os índices de rota continuem válidos durante a busca.
+    Clientes também podem ser retirados e reinseridos um a um (ruína e
+    recriação); enquanto houver clientes fora das rotas a solução não é completa.
+    """
+    __slots__ = ("dados", "distancias", "demandas", "capacidade", "deposito", "rotas",
+                 "cargas", "cargas_acumuladas", "prefixos", "posicoes", "custo", "excedidas",
+                 "integra", "completa")
+
+    def __init__(self, rotas, dados):
+        self.dados = dados
+        self.distancias = matriz_distancias_lista(dados)
+        self.demandas = dados['demandas']
+        self.capacidade = dados['capacidade']
+        self.deposito = dados['deposito']
+        self.rotas = [rota[:] for rota in rotas]
+        self.cargas = [0] * len(self.rotas)
+        self.cargas_acumuladas = [None] * len(self.rotas)
+        self.prefixos = [None] * len(self.rotas)
+        self.posicoes = {}
+        self.custo = 0.0
+        self.excedidas = 0
+        for r in range(len(self.rotas)):
+            self._recalcular_rota(r, nova=True)
+        # Nenhum cliente repetido ou inválido (os movimentos preservam isso) e,
+        # se completa, cada cliente atendido exatamente uma vez
+        mascara = mascara_clientes(dados)
+        n_visitas = sum(len(rota) for rota in self.rotas)
+        self.integra = (n_visitas == len(self.posicoes) and
+                        all(0 <= c < len(mascara) and mascara[c] for c in self.posicoes))
+        self.completa = self.integra and len(self.posicoes) == len(ids_clientes(dados))
+
+    def _recalcular_rota(self, r, nova=False):
+        """Recalcula carga, prefixos, custo e posições da rota r em O(tamanho da rota)."""
+        rota = self.rotas[r]
+        distancias = self.distancias
+        demandas = self.demandas
+        posicoes = self.posicoes
+        if not nova:
+            self.custo -= self.prefixos[r][-1]
+            self.excedidas -= self.cargas[r] > self.capacidade
+        prefixo = [0.0]
+        acumulado = 0.0
+        acumuladas = [0]
+        carga = 0
+        anterior = self.deposito
+        for p, cliente in enumerate(rota):
+            acumulado += distancias[anterior][cliente]
+            prefixo.append(acumulado)
+            carga += demandas[cliente]
+            acumuladas.append(carga)
+            posicoes[cliente] = (r, p)
+            anterior = cliente
+        prefixo.append(acumulado + distancias[anterior][self.deposito] if rota else 0.0)
+        self.prefixos[r] = prefixo
+        self.cargas[r] = carga
+        self.cargas_acumuladas[r] = acumuladas
+        self.custo += prefixo[-1]
+        self.excedidas += carga > self.capacidade
+
+    def custo_rota(self, r):
+        return self.prefixos[r][-1]
+
+    def distancia_segmento(self, r, a, b):
+        """Distância percorrida de rota[a] até rota[b] (a <= b) ao longo da rota r."""
+        return self.prefixos[r][b + 1] - self.prefixos[r][a + 1]
+
+    def valida(self):
+        """Viabilidade em O(1): todos os clientes atendidos uma vez e nenhuma rota excedida."""
+        return self.completa and self.excedidas == 0
+
+    def aplicar(self, movimento):
+        """
+        Aplica um movimento das vizinhanças (tuplas dos geradores de
+        metaheuristics/rvnd.py) e atualiza apenas as rotas afetadas.
+        Retorna os índices das rotas alteradas.
+        """
+        alteradas = rotas_apos_movimento(self.rotas, movimento)
+        for r, rota in alteradas:
+            self.rotas[r] = rota
+            self._recalcular_rota(r)
+        return [r for r, _ in alteradas]
+
+    def remover_clientes(self, clientes):
+        """Retira os clientes de suas rotas, recalculando cada rota afetada uma vez."""
+        por_rota = {}
+        for cliente in clientes:
+            r, _ = self.posicoes.pop(cliente)
+            por_rota.setdefault(r, set()).add(cliente)
+        for r, removidos in por_rota.items():
+            self.rotas[r] = [c for c in self.rotas[r] if c not in removidos]
+            self._recalcular_rota(r)
+        self.completa = False
+
+    def inserir_cliente(self, cliente, r, p):
+        """
+        Insere o cliente na posição p da rota r; r == len(self.rotas) abre
+        uma rota nova.
+        """
+        if cliente in self.posicoes:
+            self.integra = False
+        if r == len(self.rotas):
+            self.rotas.append([])
+            self.cargas.append(0)
+            self.cargas_acumuladas.append([0])
+            self.prefixos.append([0.0, 0.0])
+        self.rotas[r].insert(p, cliente)
+        self._recalcular_rota(r)
+        self.completa = self.integra and len(self.posicoes) == len(ids_clientes(self.dados))
+
+    def restaurar_rotas(self, rotas):
+        """
+        Substitui as rotas dadas (dict índice -> lista de clientes), por
+        exemplo para desfazer uma iteração rejeitada, recalculando só elas.
+        """
+        for r in rotas:
+            for cliente in self.rotas[r]:
+                del self.posicoes[cliente]
+        for r, rota in rotas.items():
+            self.rotas[r] = rota
+            self._recalcular_rota(r)
+        self.completa = self.integra and len(self.posicoes) == len(ids_clientes(self.dados))
+
+    def copiar_rotas(self):
+        """Retorna a solução como lista de rotas (sem as rotas vazias)."""
+        return [rota[:] for rota in self.rotas if rota]
+
+    def __len__(self):
+        return sum(1 for rota in self.rotas if rota)
+
+    def __repr__(self):
+        return f"Solucao(rotas={len(self)}, custo={self.custo:.2f}, valida={self.valida()})"
@@ -0,0 +1,36 @@
+
+# tests/conftest.py
+
+import os
+import sys
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from gerador import gerar_arquivo
+from parser import ler_instancia_cvrp
+
+PASTA_INSTANCIAS = os.path.join(RAIZ, "instances")
+
+@pytest.fixture(scope="session")
+def instancia5():
+    """instance5.vrp (DIMENSION 502, depósito 1, clientes 2..502)."""
+    return ler_instancia_cvrp(os.path.join(PASTA_INSTANCIAS, "instance5.vrp"), usar_cache=False)
+
+@pytest.fixture(scope="session")
+def instancia_pequena(tmp_path_factory):
+    """Instância X gerada com 60 clientes (depósito 1, clientes 2..61)."""
+    pasta = tmp_path_factory.mktemp("instancias")
+    caminho = gerar_arquivo(str(pasta), 60, semente=3, tamanho_rota=8)
+    return ler_instancia_cvrp(caminho, usar_cache=False)
+
+def atendidos_uma_vez(rotas, dados):
+    """True se cada id exceto o depósito aparece exatamente uma vez nas rotas."""
+    visitas = sorted(c for rota in rotas for c in rota)
+    esperados = sorted(int(i) for i in dados.ids if int(i) not in dados.depositos)
+    return visitas == esperados
+
+def capacidade_respeitada(rotas, dados):
+    demandas = dados['demandas']
+    return all(sum(demandas[c] for c in rota) <= dados['capacidade'] for rota in rotas)
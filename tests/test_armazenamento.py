@@ -0,0 +1,92 @@
+
+# tests/test_armazenamento.py
+
+import os
+import shutil
+import sqlite3
+import main
+from armazenamento import ArmazemResultados, chave_config, versao_codigo
+from conftest import RAIZ
+
+def copiar_projeto(destino):
+    shutil.copytree(RAIZ, destino, ignore=shutil.ignore_patterns(
+        "instances", "resultados", "tests", ".git", "__pycache__", "*.ipynb*"))
+    return str(destino)
+
+def test_versao_ignora_ferramentas(tmp_path):
+    raiz = copiar_projeto(tmp_path / "projeto")
+    versao = versao_codigo(raiz)
+    for modulo in ("benchmark.py", "consolidacao.py", "gerador.py", "perfil.py", "main.py"):
+        with open(os.path.join(raiz, modulo), "a") as f:
+            f.write("\n# alteração\n")
+    assert versao_codigo(raiz) == versao
+
+def test_versao_muda_com_heuristicas(tmp_path):
+    raiz = copiar_projeto(tmp_path / "projeto")
+    versao = versao_codigo(raiz)
+    with open(os.path.join(raiz, "heuristics", "savings.py"), "a") as f:
+        f.write("\n# alteração\n")
+    assert versao_codigo(raiz) != versao
+
+def test_migra_coluna_solucao_antiga(tmp_path):
+    # Esquema anterior à tabela solucoes (e à coluna perfil)
+    caminho = str(tmp_path / "antigo.db")
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("""
+        CREATE TABLE resultados (
+            instancia TEXT NOT NULL, metodo TEXT NOT NULL, config TEXT NOT NULL,
+            semente INTEGER NOT NULL, versao TEXT NOT NULL, custo REAL, tempo REAL,
+            qtd_rotas INTEGER, qtd_veiculos INTEGER, intensificacao TEXT,
+            diversificacao TEXT, solucao TEXT, criado_em REAL,
+            PRIMARY KEY (instancia, metodo, config, semente, versao))""")
+    conexao.execute("INSERT INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ("i.vrp", "Savings", "", 0, "v1", 10.0, 0.5, 2, 2, "", "",
+                     "[[2, 3], [4]]", 1.0))
+    conexao.commit()
+    conexao.close()
+
+    with ArmazemResultados(caminho) as armazem:
+        colunas = {c[1] for c in armazem.conexao.execute("PRAGMA table_info(resultados)")}
+        assert "solucao" not in colunas
+        assert armazem.solucao("i.vrp", "Savings", "", 0, "v1") == [[2, 3], [4]]
+        linha, = armazem.linhas()
+        assert linha["custo"] == 10.0 and linha["versao"] == "v1"
+        assert armazem.concluidas("v1") == {("i.vrp", "Savings", "", 0)}
+
+def resultado(custo, tempo, perfil=None):
+    return {"Instancia": "i.vrp", "Metodo": "Savings", "Config": "", "Semente": 0,
+            "Custo": custo, "Tempo (s)": tempo, "Qtd Rotas": 2, "Qtd Veiculos": 2,
+            "Intensificacao": "", "Diversificacao": "", "Solucao": [[2, 3], [4]], "Perfil": perfil}
+
+def test_perfil_nao_substitui_linha_cronometrada(tmp_path):
+    with ArmazemResultados(str(tmp_path / "r.db")) as armazem:
+        armazem.gravar(resultado(10.0, 0.5), "v1")
+        armazem.gravar(resultado(10.0, 3.0, {"tempo_savings (s)": 2.0}), "v1")
+        linha, = armazem.linhas("v1")
+        assert linha["tempo"] == 0.5
+        assert linha["tempo_perfil"] == 3.0 and linha["tempo_savings (s)"] == 2.0
+        assert armazem.concluidas("v1") == armazem.perfiladas("v1") == {("i.vrp", "Savings", "", 0)}
+
+def test_migra_linha_com_perfil(tmp_path):
+    # Esquema com a coluna perfil em resultados: a linha foi cronometrada com perfil
+    caminho = str(tmp_path / "perfil.db")
+    with ArmazemResultados(caminho) as armazem:
+        armazem.conexao.execute("ALTER TABLE resultados ADD COLUMN perfil TEXT")
+        armazem.gravar(resultado(10.0, 3.0), "v1")
+        armazem.conexao.execute("UPDATE resultados SET perfil = ?", ('{"tempo_savings (s)": 2.0}',))
+        armazem.conexao.commit()
+    with ArmazemResultados(caminho) as armazem:
+        colunas = {c[1] for c in armazem.conexao.execute("PRAGMA table_info(resultados)")}
+        assert "perfil" not in colunas
+        assert armazem.concluidas("v1") == set()
+        assert armazem.perfiladas("v1") == {("i.vrp", "Savings", "", 0)}
+
+def test_tempo_limite_faz_parte_da_chave_de_retomada(monkeypatch):
+    monkeypatch.setattr(main, "PASTA_INSTANCIAS", os.path.join(RAIZ, "instances"))
+    tarefas = main.gerar_tarefas(["instance5.vrp"], ilhas=True)
+    configs = [t["config"] for t in tarefas if t["config"] is not None]
+    assert configs
+    for config in configs:
+        assert config["tempo_limite"] == main.TEMPO_LIMITE
+        assert "solucao_inicial" in config
+        assert chave_config(config) != chave_config(dict(config, tempo_limite=30 * 60))
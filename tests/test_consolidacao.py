@@ -0,0 +1,49 @@
+
+# tests/test_consolidacao.py
+
+import filecmp
+import glob
+import os
+import shutil
+import pandas as pd
+from armazenamento import ArmazemResultados
+from conftest import RAIZ
+from consolidacao import consolidar
+
+def resultado(metodo, custo):
+    return {"Instancia": "i.vrp", "Metodo": metodo, "Config": "", "Semente": 0, "Custo": custo,
+            "Tempo (s)": 1.0, "Qtd Rotas": 2, "Qtd Veiculos": 2, "Intensificacao": "",
+            "Diversificacao": "", "Solucao": [[2, 3], [4]]}
+
+def test_tabelas_so_da_versao_consolidada(tmp_path):
+    pasta = str(tmp_path)
+    arquivo = os.path.join(pasta, "resultados.db")
+    with ArmazemResultados(arquivo) as armazem:
+        armazem.gravar(resultado("Savings", 100.0), "antiga")
+        armazem.gravar(resultado("Savings", 50.0), "atual")
+        armazem.gravar(resultado("Insertion", 60.0), "atual")
+    pd.DataFrame([{"Instancia": "i.vrp", "Metodo": "Savings", "Custo": 10.0, "Tempo (s)": 1.0,
+                   "Qtd Rotas": 1, "Qtd Veiculos": 1, "Intensificacao": "",
+                   "Diversificacao": "", "Solucao": "[[2]]"}]).to_csv(
+        os.path.join(pasta, "resultados_i.csv"), index=False)
+
+    tabelas = consolidar(pasta, arquivo, versao="atual")
+    custos = tabelas["custo_medio_por_metodo.csv"]["Custo"]
+    assert custos.to_dict() == {"Savings": 50.0, "Insertion": 60.0}
+    assert tabelas["ranking_medio_por_metodo.csv"]["Ranking"].to_dict() == {"Savings": 1.0,
+                                                                           "Insertion": 2.0}
+    assert tabelas["legado_custo_medio_por_metodo.csv"]["Custo"].to_dict() == {"Savings": 10.0}
+
+def test_so_csvs_antigos_preservam_os_resumos_existentes(tmp_path):
+    pasta = str(tmp_path)
+    origem = os.path.join(RAIZ, "resultados")
+    arquivos = glob.glob(os.path.join(origem, "*.csv"))
+    resumos = [os.path.basename(a) for a in arquivos if not os.path.basename(a).startswith("resultados_")]
+    assert resumos
+    for arquivo in arquivos:
+        shutil.copy(arquivo, pasta)
+
+    tabelas = consolidar(pasta, os.path.join(pasta, "resultados.db"), versao="atual")
+    assert tabelas and all(nome.startswith("legado_") for nome in tabelas)
+    iguais, diferentes, erros = filecmp.cmpfiles(origem, pasta, resumos, shallow=False)
+    assert sorted(iguais) == sorted(resumos), (diferentes, erros)
@@ -0,0 +1,81 @@
+
+# tests/test_heuristicas.py
+
+import random
+import pytest
+from conftest import atendidos_uma_vez, capacidade_respeitada
+from heuristics import HEURISTICAS
+from heuristics.insertion import insertion_heuristica
+from heuristics.route_first import rota_gigante_vizinho_mais_proximo, split_otimo
+from parser import ler_instancia_cvrp
+from test_parser import instancia_explicita
+from utils import calcular_custo_total, calcular_vizinhos_proximos, gerar_solucao_inicial, ids_clientes, solucao_valida
+
+@pytest.mark.parametrize("nome", sorted(HEURISTICAS))
+@pytest.mark.parametrize("instancia", ["instancia5", "instancia_pequena"])
+def test_heuristica_atende_cada_cliente_uma_vez(nome, instancia, request):
+    dados = request.getfixturevalue(instancia)
+    rotas = HEURISTICAS[nome](dados)
+    assert all(dados['deposito'] not in rota for rota in rotas)
+    assert atendidos_uma_vez(rotas, dados)
+    assert capacidade_respeitada(rotas, dados)
+    assert solucao_valida(rotas, dados)
+
+def test_solucao_inicial_sem_deposito(instancia5):
+    rotas = gerar_solucao_inicial(instancia5)
+    assert atendidos_uma_vez(rotas, instancia5)
+
+def test_solucao_valida_rejeita_deposito_e_cliente_faltando(instancia5):
+    rotas = gerar_solucao_inicial(instancia5)
+    assert solucao_valida(rotas, instancia5)
+    # O depósito no lugar do último cliente (id 502)
+    assert not solucao_valida(rotas[:-1] + [[instancia5['deposito']]], instancia5)
+    assert not solucao_valida(rotas[:-1], instancia5)
+
+def test_vizinhos_proximos_so_clientes(instancia5):
+    candidatos = calcular_vizinhos_proximos(instancia5, 10)
+    deposito = instancia5['deposito']
+    assert candidatos[deposito] == []
+    assert all(deposito not in vizinhos for vizinhos in candidatos)
+    assert len(candidatos[502]) == 10
+
+def split_bellman(rota_tsp, dados):
+    """Custo do split ótimo de referência: Bellman no grafo auxiliar, em O(n²)."""
+    distancias = dados['distancias']
+    demandas = dados['demandas']
+    deposito = dados['deposito']
+    n = len(rota_tsp)
+    custo = [0.0] + [float('inf')] * n
+    for i in range(n):
+        carga = 0
+        percurso = 0.0
+        for j in range(i + 1, n + 1):
+            cliente = rota_tsp[j - 1]
+            carga += demandas[cliente]
+            if carga > dados['capacidade']:
+                break
+            anterior = rota_tsp[j - 2] if j > i + 1 else deposito
+            percurso += distancias[anterior, cliente]
+            custo[j] = min(custo[j], custo[i] + percurso + distancias[cliente, deposito])
+    return custo[n]
+
+@pytest.mark.parametrize("semente", range(8))
+def test_split_otimo_igual_ao_bellman(instancia_pequena, semente):
+    rng = random.Random(semente)
+    rota_tsp = ids_clientes(instancia_pequena)
+    rng.shuffle(rota_tsp)
+    rota_tsp = rota_tsp[:rng.randint(1, len(rota_tsp))]
+    rotas = split_otimo(rota_tsp, instancia_pequena)
+    assert [c for rota in rotas for c in rota] == rota_tsp
+    assert capacidade_respeitada(rotas, instancia_pequena)
+    assert calcular_custo_total(rotas, instancia_pequena) == pytest.approx(
+        split_bellman(rota_tsp, instancia_pequena))
+
+@pytest.mark.parametrize("exibicao", [False, True])
+def test_explicita_segue_os_pesos_e_nao_as_coordenadas(tmp_path, exibicao):
+    # Pelos pesos: 3 é o mais próximo do depósito, depois 2 e 4; pelas
+    # coordenadas de exibição (em linha), seria 2, 3, 4
+    dados = ler_instancia_cvrp(instancia_explicita(tmp_path / "e.vrp", "FULL_MATRIX", exibicao),
+                               usar_cache=False)
+    assert rota_gigante_vizinho_mais_proximo(dados) == [3, 2, 4]
+    assert insertion_heuristica(dados) == [[3], [2], [4]]
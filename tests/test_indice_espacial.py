@@ -0,0 +1,72 @@
+
+# tests/test_indice_espacial.py
+
+import random
+import pytest
+from indice_espacial import IndiceEspacial
+from utils import construir_matriz_distancias
+
+def pontos_com_empates(semente, n_nos=80):
+    """
+    Nós em coordenadas inteiras de uma grade 10 x 6 (com repetições, logo
+    muitos empates) e pontos de consulta: os próprios nós, os cantos e o
+    meio das bordas do retângulo envolvente, pontos fora dele e pontos
+    sobre as fronteiras das células do índice.
+    Retorna (coordenadas, nos, consultas), com as consultas também em
+    coordenadas (ids após os nós), para a distância vir da matriz.
+    """
+    rng = random.Random(semente)
+    coordenadas = {no: (rng.randint(0, 9), rng.randint(0, 5)) for no in range(1, n_nos + 1)}
+    nos = list(coordenadas)
+    xs = [x for x, _ in coordenadas.values()]
+    ys = [y for _, y in coordenadas.values()]
+    x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+    extras = [(x0, y0), (x0, y1), (x1, y0), (x1, y1), ((x0 + x1) / 2, y0), (x1, (y0 + y1) / 2),
+              (x0 - 3, y0 - 2), (x1 + 4, (y0 + y1) / 2), ((x0 + x1) / 2, y1 + 0.5), (x1 + 1, y1 + 1)]
+    lado = IndiceEspacial(coordenadas, nos).lado
+    extras += [(x0 + m * lado, y0 + m * lado) for m in range(1, 4)]
+    extras += [(rng.uniform(x0 - 2, x1 + 2), rng.uniform(y0 - 2, y1 + 2)) for _ in range(20)]
+    consultas = []
+    for ponto in list(coordenadas.values()) + extras:
+        consulta = len(coordenadas) + 1
+        coordenadas[consulta] = ponto
+        consultas.append(consulta)
+    return coordenadas, nos, consultas
+
+def forca_bruta(distancias, consulta, presentes, k):
+    return sorted(presentes, key=lambda no: (distancias[consulta][no], no))[:k]
+
+@pytest.mark.parametrize("arredondar", [False, True])
+@pytest.mark.parametrize("semente", range(3))
+def test_consultas_iguais_a_forca_bruta(semente, arredondar):
+    coordenadas, nos, consultas = pontos_com_empates(semente)
+    distancias = construir_matriz_distancias(coordenadas, arredondar)
+    indice = IndiceEspacial(coordenadas, nos, arredondar)
+    presentes = set(nos)
+    ordem_remocao = nos[:]
+    random.Random(semente).shuffle(ordem_remocao)
+    while True:
+        for consulta in consultas:
+            x, y = coordenadas[consulta]
+            esperado = forca_bruta(distancias, consulta, presentes, len(presentes))
+            assert indice.mais_proximo(x, y) == (esperado[0] if esperado else None), (x, y)
+            for k in (1, 2, 5, len(presentes), len(presentes) + 3):
+                assert indice.k_mais_proximos(x, y, k) == esperado[:k], (x, y, k)
+        if not presentes:
+            break
+        # Remove um quarto dos nós restantes por rodada (o índice fica esparso)
+        for _ in range(max(1, len(presentes) // 4)):
+            no = ordem_remocao.pop()
+            indice.remover(no)
+            presentes.discard(no)
+            assert no not in indice
+        assert len(indice) == len(presentes)
+
+def test_todos_os_nos_no_mesmo_ponto():
+    coordenadas = {no: (2.0, 2.0) for no in range(1, 6)}
+    indice = IndiceEspacial(coordenadas, [5, 3, 1, 4, 2])
+    assert indice.mais_proximo(2.0, 2.0) == 1
+    assert indice.k_mais_proximos(-1.0, 7.0, 3) == [1, 2, 3]
+    indice.remover(1)
+    assert indice.mais_proximo(10.0, 10.0) == 2
+    assert indice.k_mais_proximos(2.0, 2.0, 0) == []
@@ -0,0 +1,205 @@
+
+# tests/test_metaheuristicas.py
+
+import random
+import time
+import pytest
+from conftest import atendidos_uma_vez, capacidade_respeitada
+from heuristics import HEURISTICAS
+from metaheuristics.ilhas import busca_ilhas
+from metaheuristics.ruina_recriacao import insercao_regret, remocao_strings
+from metaheuristics import tabu_search as modulo_tabu
+from metaheuristics.rvnd import EPSILON, GERADORES, rvnd
+from metaheuristics.tabu_search import MemoriaTabu, tabu_search
+from rastro import Rastro
+from solucao import Solucao
+from utils import (
+    calcular_custo_total,
+    calcular_vizinhos_proximos,
+    gerar_solucao_inicial,
+    rotas_apos_movimento,
+    solucao_valida
+)
+
+def confere_movimentos(rotas, dados, movimentos):
+    """
+    Delta de cada movimento (movimento, delta) e a verificação local de
+    solucao_valida contra a solução recalculada.
+    """
+    solucao = Solucao(rotas, dados)
+    custo = calcular_custo_total(rotas, dados)
+    for movimento, delta in movimentos:
+        novas = list(rotas)
+        for r, rota in rotas_apos_movimento(rotas, movimento):
+            novas[r] = rota
+        assert sorted(c for rota in novas for c in rota) == sorted(c for rota in rotas for c in rota)
+        assert calcular_custo_total(novas, dados) - custo == pytest.approx(delta, abs=1e-6), movimento
+        respeita = capacidade_respeitada(novas, dados)
+        assert solucao_valida(rotas, dados, "local", movimento, solucao.cargas,
+                              solucao.cargas_acumuladas) == respeita, movimento
+        assert solucao_valida(rotas, dados, "local", movimento, solucao.cargas) == respeita, movimento
+
+def test_ilhas_sem_tempo_devolvem_a_solucao_inicial(instancia_pequena):
+    rastro = Rastro()
+    rotas = busca_ilhas(instancia_pequena, tempo_limite=0, processos=2, rastro=rastro)
+    assert rotas == HEURISTICAS["Savings"](instancia_pequena)
+    assert rastro.pontos
+
+def test_ilhas_trocam_elite_sem_piorar(instancia_pequena):
+    inicial = HEURISTICAS["Savings"](instancia_pequena)
+    rastro = Rastro()
+    rotas = busca_ilhas(instancia_pequena, tempo_limite=2, processos=2, intervalo_troca=0.5,
+                        rastro=rastro)
+    assert atendidos_uma_vez(rotas, instancia_pequena)
+    assert capacidade_respeitada(rotas, instancia_pequena)
+    assert calcular_custo_total(rotas, instancia_pequena) <= calcular_custo_total(inicial, instancia_pequena)
+    # A elite inicial e ao menos uma troca por ilha
+    assert len(rastro.pontos) >= 2
+
+@pytest.mark.parametrize("nome", sorted(GERADORES))
+def test_delta_gerador_rvnd_igual_ao_custo_recalculado(instancia_pequena, nome):
+    solucao = Solucao(HEURISTICAS["Savings"](instancia_pequena), instancia_pequena)
+    candidatos = calcular_vizinhos_proximos(instancia_pequena, 8)
+    movimentos = [m for c in solucao.posicoes for m in GERADORES[nome](solucao, c, candidatos)]
+    assert movimentos
+    confere_movimentos(solucao.rotas, instancia_pequena, movimentos)
+
+@pytest.mark.parametrize("semente", range(3))
+def test_rvnd_para_em_otimo_local_de_todos_os_geradores(instancia_pequena, semente):
+    inicial = gerar_solucao_inicial(instancia_pequena)
+    solucao = Solucao(inicial, instancia_pequena)
+    candidatos = calcular_vizinhos_proximos(instancia_pequena, 10)
+    assert rvnd(solucao, candidatos, rng=random.Random(semente)) > 0
+    rotas = solucao.copiar_rotas()
+    assert atendidos_uma_vez(rotas, instancia_pequena)
+    assert capacidade_respeitada(rotas, instancia_pequena)
+    assert solucao.custo == pytest.approx(calcular_custo_total(rotas, instancia_pequena))
+    assert solucao.custo < calcular_custo_total(inicial, instancia_pequena)
+    for c in solucao.posicoes:
+        for nome, gerador in GERADORES.items():
+            for movimento, delta in gerador(solucao, c, candidatos):
+                assert delta >= -EPSILON or not solucao_valida(
+                    solucao.rotas, instancia_pequena, "local", movimento,
+                    solucao.cargas, solucao.cargas_acumuladas), (nome, movimento)
+
+def test_rvnd_respeita_o_prazo(instancia_pequena):
+    inicial = gerar_solucao_inicial(instancia_pequena)
+    solucao = Solucao(inicial, instancia_pequena)
+    candidatos = calcular_vizinhos_proximos(instancia_pequena, 10)
+    # Prazo já vencido: nenhum movimento é avaliado nem aplicado
+    assert rvnd(solucao, candidatos, prazo=time.time()) == 0
+    assert solucao.copiar_rotas() == inicial
+
+@pytest.mark.parametrize("inicio", ["Savings", "Insertion", "rotas"])
+def test_tabu_com_solucao_inicial_e_ruina_e_recriacao(instancia_pequena, monkeypatch, inicio):
+    # Partida a quente pelo nome da heurística ou por uma lista de rotas
+    rotas_iniciais = HEURISTICAS["RouteFirstClusterSecond"](instancia_pequena)
+    solucao_inicial = rotas_iniciais if inicio == "rotas" else inicio
+    custo_inicial = calcular_custo_total(
+        rotas_iniciais if inicio == "rotas" else HEURISTICAS[inicio](instancia_pequena), instancia_pequena)
+    perturbacoes = []
+    ruina_recriacao = modulo_tabu.ruina_recriacao
+    monkeypatch.setattr(modulo_tabu, "ruina_recriacao",
+                        lambda *args, **kwargs: perturbacoes.append(args[1]) or ruina_recriacao(*args, **kwargs))
+    rotas = tabu_search(instancia_pequena, tempo_limite=1, granular=True, k_vizinhos=10,
+                        max_iter_sem_melhora=3, vizinhancas=sorted(GERADORES),
+                        solucao_inicial=solucao_inicial, k_perturbacao=5)
+    assert perturbacoes and set(perturbacoes) == {5}
+    assert atendidos_uma_vez(rotas, instancia_pequena)
+    assert capacidade_respeitada(rotas, instancia_pequena)
+    assert calcular_custo_total(rotas, instancia_pequena) <= custo_inicial
+    if inicio == "rotas":
+        assert rotas_iniciais == HEURISTICAS["RouteFirstClusterSecond"](instancia_pequena)
+
+def test_tabu_rejeita_heuristica_desconhecida(instancia_pequena):
+    with pytest.raises(ValueError, match="Heurística desconhecida"):
+        tabu_search(instancia_pequena, tempo_limite=1, solucao_inicial="Inexistente")
+
+@pytest.mark.parametrize("k_regret", [1, 2, 3])
+@pytest.mark.parametrize("semente", range(4))
+def test_remocao_strings_e_regret_atendem_cada_cliente_uma_vez(instancia_pequena, k_regret, semente):
+    rng = random.Random(semente)
+    solucao = Solucao(HEURISTICAS["Savings"](instancia_pequena), instancia_pequena)
+    vizinhos = calcular_vizinhos_proximos(instancia_pequena, 15)
+    for _ in range(20):
+        removidos = remocao_strings(solucao, rng.randint(1, 15), vizinhos, rng=rng)
+        assert len(set(removidos)) == len(removidos)
+        solucao.remover_clientes(removidos)
+        insercao_regret(solucao, removidos, k_regret)
+        rotas = solucao.copiar_rotas()
+        assert atendidos_uma_vez(rotas, instancia_pequena)
+        assert capacidade_respeitada(rotas, instancia_pequena)
+        assert solucao.valida()
+        assert solucao.custo == pytest.approx(calcular_custo_total(rotas, instancia_pequena))
+
+def test_restaurar_rotas_desfaz_ruina_e_recriacao(instancia_pequena):
+    rng = random.Random(0)
+    original = HEURISTICAS["Savings"](instancia_pequena)
+    solucao = Solucao(original, instancia_pequena)
+    vizinhos = calcular_vizinhos_proximos(instancia_pequena, 15)
+    removidos = remocao_strings(solucao, 12, vizinhos, rng=rng)
+    anteriores = {r: solucao.rotas[r][:] for r in {solucao.posicoes[c][0] for c in removidos}}
+    solucao.remover_clientes(removidos)
+    insercao_regret(solucao, removidos)
+    for cliente in removidos:
+        r = solucao.posicoes[cliente][0]
+        if r not in anteriores:
+            anteriores[r] = [c for c in solucao.rotas[r] if c not in removidos]
+    solucao.restaurar_rotas(anteriores)
+    referencia = Solucao(original, instancia_pequena)
+    assert solucao.copiar_rotas() == original
+    assert solucao.posicoes == referencia.posicoes
+    assert solucao.custo == pytest.approx(referencia.custo)
+    assert solucao.valida()
+
+def test_memoria_tabu_expira_no_tenure_sorteado():
+    memoria = MemoriaTabu(3, 6, rng=random.Random(0))
+    tenures = set()
+    for iteracao in range(200):
+        memoria.registrar(("c", iteracao), iteracao)
+        tenure = memoria.expiracao[("c", iteracao)] - iteracao
+        assert 3 <= tenure <= 6
+        tenures.add(tenure)
+        assert memoria.eh_tabu(("c", iteracao), iteracao + tenure - 1)
+        assert not memoria.eh_tabu(("c", iteracao), iteracao + tenure)
+    assert tenures == {3, 4, 5, 6}
+    assert not memoria.eh_tabu(("nunca", 0), 0)
+    memoria.limpar()
+    assert not memoria.expiracao
+
+def test_memoria_tabu_descarta_atributos_expirados():
+    memoria = MemoriaTabu(1, 2, rng=random.Random(0))
+    for iteracao in range(64 * 2 + 1):
+        memoria.registrar(iteracao, iteracao)
+    # Ao passar de 64 * tenure_max atributos, só os ainda tabu ficam
+    assert len(memoria.expiracao) <= 3
+    assert all(expiracao > 64 * 2 for expiracao in memoria.expiracao.values())
+    assert memoria.eh_tabu(64 * 2, 64 * 2)
+
+class MemoriaTudoTabu(MemoriaTabu):
+    """Memória em que todo atributo é tabu: só a aspiração admite movimentos."""
+    consultas = 0
+
+    def eh_tabu(self, atributo, iteracao):
+        MemoriaTudoTabu.consultas += 1
+        return True
+
+def test_aspiracao_admite_movimento_tabu_que_melhora(instancia_pequena, monkeypatch):
+    monkeypatch.setattr(modulo_tabu, "MemoriaTabu", MemoriaTudoTabu)
+    inicial = gerar_solucao_inicial(instancia_pequena)
+    rotas = tabu_search(instancia_pequena, tempo_limite=60, intensificacao=False,
+                        diversificacao=False, granular=True, k_vizinhos=10,
+                        solucao_inicial=inicial)
+    assert MemoriaTudoTabu.consultas > 0
+    assert atendidos_uma_vez(rotas, instancia_pequena)
+    assert capacidade_respeitada(rotas, instancia_pequena)
+    assert calcular_custo_total(rotas, instancia_pequena) < calcular_custo_total(inicial, instancia_pequena)
+    # Só movimentos que melhoram a melhor solução passam: a busca termina
+    # quando nenhum swap ou relocate melhora
+    solucao = Solucao(rotas, instancia_pequena)
+    candidatos = calcular_vizinhos_proximos(instancia_pequena, 10)
+    for c in solucao.posicoes:
+        for nome in ("swap", "relocate"):
+            for movimento, delta in GERADORES[nome](solucao, c, candidatos):
+                assert delta >= -EPSILON or not solucao_valida(
+                    solucao.rotas, instancia_pequena, "local", movimento, solucao.cargas)
@@ -0,0 +1,132 @@
+
+# tests/test_parser.py
+
+import os
+import numpy as np
+import pytest
+import parser
+from parser import ler_instancia_cvrp
+
+# Pesos simétricos de uma instância EXPLICIT com 4 nós (depósito 1)
+PESOS = np.array([[0, 5, 1, 10],
+                  [5, 0, 1, 1],
+                  [1, 1, 0, 10],
+                  [10, 1, 10, 0]], dtype=float)
+
+# Condição de cada formato do TSPLIB sobre (linha, coluna)
+TRIANGULOS = {
+    "FULL_MATRIX": lambda i, j: True,
+    "UPPER_ROW": lambda i, j: i < j,
+    "LOWER_ROW": lambda i, j: i > j,
+    "UPPER_DIAG_ROW": lambda i, j: i <= j,
+    "LOWER_DIAG_ROW": lambda i, j: i >= j,
+    "UPPER_COL": lambda i, j: i < j,
+    "LOWER_COL": lambda i, j: i > j,
+    "UPPER_DIAG_COL": lambda i, j: i <= j,
+    "LOWER_DIAG_COL": lambda i, j: i >= j,
+}
+
+def valores_formato(matriz, formato):
+    """Valores da EDGE_WEIGHT_SECTION no formato dado, percorrendo por linha ou por coluna."""
+    n = len(matriz)
+    dentro = TRIANGULOS[formato]
+    if formato.endswith("_COL"):
+        return [matriz[i][j] for j in range(n) for i in range(n) if dentro(i, j)]
+    return [matriz[i][j] for i in range(n) for j in range(n) if dentro(i, j)]
+
+def escrever_instancia(caminho, cabecalho, secoes):
+    """Grava um arquivo CVRPLIB com o cabeçalho (dict) e as seções (dict nome -> linhas)."""
+    with open(caminho, "w") as f:
+        for chave, valor in cabecalho.items():
+            f.write(f"{chave} : {valor}\n")
+        for nome, linhas in secoes.items():
+            f.write(f"{nome}\n")
+            for linha in linhas:
+                f.write(" ".join(str(v) for v in linha) + "\n")
+        f.write("EOF\n")
+    return str(caminho)
+
+def instancia_explicita(caminho, formato, exibicao=False):
+    cabecalho = {"NAME": "teste", "TYPE": "CVRP", "DIMENSION": 4, "EDGE_WEIGHT_TYPE": "EXPLICIT",
+                 "EDGE_WEIGHT_FORMAT": formato, "CAPACITY": 1}
+    secoes = {"EDGE_WEIGHT_SECTION": [[int(v) for v in valores_formato(PESOS, formato)]],
+              "DEMAND_SECTION": [[1, 0], [2, 1], [3, 1], [4, 1]]}
+    if exibicao:
+        secoes["DISPLAY_DATA_SECTION"] = [[1, 0, 0], [2, 1, 0], [3, 2, 0], [4, 3, 0]]
+    secoes["DEPOT_SECTION"] = [[1], [-1]]
+    return escrever_instancia(caminho, cabecalho, secoes)
+
+def instancia_euclidiana(caminho, n_nos, dimensao=None, depositos=(1,)):
+    cabecalho = {"NAME": "teste", "TYPE": "CVRP", "DIMENSION": dimensao or n_nos,
+                 "EDGE_WEIGHT_TYPE": "EUC_2D", "CAPACITY": 10}
+    secoes = {"NODE_COORD_SECTION": [[i, i * 3 % 7, i * 5 % 11] for i in range(1, n_nos + 1)],
+              "DEMAND_SECTION": [[i, 0 if i in depositos else 1] for i in range(1, n_nos + 1)],
+              "DEPOT_SECTION": [[d] for d in depositos] + [[-1]]}
+    return escrever_instancia(caminho, cabecalho, secoes)
+
+@pytest.mark.parametrize("formato", sorted(TRIANGULOS))
+def test_formatos_explicitos(tmp_path, formato):
+    dados = ler_instancia_cvrp(instancia_explicita(tmp_path / "e.vrp", formato), usar_cache=False)
+    np.testing.assert_array_equal(dados.pesos, PESOS)
+    np.testing.assert_array_equal(dados['distancias'][1:, 1:], PESOS)
+    assert dados['coordenadas'] == {}
+
+def test_explicita_com_coordenadas_de_exibicao_usa_os_pesos(tmp_path):
+    dados = ler_instancia_cvrp(instancia_explicita(tmp_path / "e.vrp", "FULL_MATRIX", exibicao=True),
+                               usar_cache=False)
+    assert dados['coordenadas'][3] == (2.0, 0.0)
+    np.testing.assert_array_equal(dados['distancias'][1:, 1:], PESOS)
+
+def test_dimension_divergente(tmp_path):
+    caminho = instancia_euclidiana(tmp_path / "d.vrp", 5, dimensao=6)
+    with pytest.raises(ValueError, match="DIMENSION=6"):
+        ler_instancia_cvrp(caminho, usar_cache=False)
+
+def test_quantidade_de_pesos_divergente(tmp_path):
+    caminho = instancia_explicita(tmp_path / "e.vrp", "UPPER_ROW")
+    with open(caminho) as f:
+        texto = f.read()
+    with open(caminho, "w") as f:
+        f.write(texto.replace("EDGE_WEIGHT_FORMAT : UPPER_ROW", "EDGE_WEIGHT_FORMAT : FULL_MATRIX"))
+    with pytest.raises(ValueError, match="EDGE_WEIGHT_SECTION"):
+        ler_instancia_cvrp(caminho, usar_cache=False)
+
+def test_varios_depositos(tmp_path):
+    dados = ler_instancia_cvrp(instancia_euclidiana(tmp_path / "m.vrp", 8, depositos=(1, 5)),
+                               usar_cache=False)
+    assert dados.depositos == [1, 5]
+    assert dados['deposito'] == 1
+    assert dados['n_clientes'] == 6
+    assert dados['clientes'] == [2, 3, 4, 6, 7, 8]
+
+def test_cache_invalidado_por_mtime_tamanho_e_versao(tmp_path, monkeypatch):
+    caminho = instancia_euclidiana(tmp_path / "c.vrp", 6)
+    leituras = []
+    interpretar = parser.interpretar_arquivo
+    monkeypatch.setattr(parser, "interpretar_arquivo",
+                        lambda arquivo: leituras.append(arquivo) or interpretar(arquivo))
+
+    ler_instancia_cvrp(caminho)
+    assert os.path.exists(caminho + ".npz")
+    dados = ler_instancia_cvrp(caminho)
+    assert len(leituras) == 1
+    assert dados['n_clientes'] == 5
+
+    # Mesmo tamanho, mtime diferente
+    estado = os.stat(caminho)
+    os.utime(caminho, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+    ler_instancia_cvrp(caminho)
+    assert len(leituras) == 2
+
+    # Tamanho diferente, mtime restaurado
+    with open(caminho, "a") as f:
+        f.write("\n")
+    os.utime(caminho, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10**9))
+    ler_instancia_cvrp(caminho)
+    assert len(leituras) == 3
+    ler_instancia_cvrp(caminho)
+    assert len(leituras) == 3
+
+    monkeypatch.setattr(parser, "VERSAO_CACHE", parser.VERSAO_CACHE + 1)
+    ler_instancia_cvrp(caminho)
+    assert len(leituras) == 4
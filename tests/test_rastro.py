@@ -0,0 +1,46 @@
+
+# tests/test_rastro.py
+
+import numpy as np
+import pytest
+from metaheuristics.tabu_search import tabu_search
+from rastro import COLUNAS_RASTRO, Rastro, ler_rastro
+from utils import calcular_custo_total
+
+def test_colunas_e_ida_e_volta_npz(tmp_path):
+    rastro = Rastro(intervalo=3600)
+    rastro.registrar(0, 100.0, 100.0, 10, melhorou=True)
+    rastro.registrar(1, 105.0, 100.0, 20)            # sem melhora e antes da amostra: ignorado
+    rastro.registrar(2, 90.0, 90.0, 30, melhorou=True)
+    rastro.finalizar(3, 95.0, 90.0)
+    arrays = rastro.como_arrays()
+    assert tuple(arrays) == COLUNAS_RASTRO
+    assert arrays["iteracao"].tolist() == [0, 2, 3]
+    assert arrays["custo_atual"].tolist() == [100.0, 90.0, 95.0]
+    assert arrays["melhor_custo"].tolist() == [100.0, 90.0, 90.0]
+    assert arrays["vizinhanca"].tolist() == [10, 30, 0]
+    assert arrays["melhora"].tolist() == [1, 1, 0]
+    assert arrays["iteracao"].dtype == np.int64 and arrays["tempo"].dtype == np.float64
+    assert np.all(np.diff(arrays["tempo"]) >= 0)
+
+    caminho = str(tmp_path / "sub" / "rastro.npz")
+    rastro.gravar(caminho)
+    lido = ler_rastro(caminho)
+    assert tuple(lido) == COLUNAS_RASTRO
+    for nome in COLUNAS_RASTRO:
+        np.testing.assert_array_equal(lido[nome], arrays[nome])
+        assert lido[nome].dtype == arrays[nome].dtype
+
+def test_rastro_vazio():
+    arrays = Rastro().como_arrays()
+    assert all(len(valores) == 0 for valores in arrays.values())
+
+def test_tabu_registra_o_ponto_final(instancia_pequena):
+    rastro = Rastro()
+    tempo_limite = 0.5
+    rotas = tabu_search(instancia_pequena, tempo_limite=tempo_limite, granular=True,
+                        solucao_inicial="Savings", rastro=rastro)
+    arrays = rastro.como_arrays()
+    assert arrays["tempo"][-1] >= tempo_limite
+    assert arrays["melhor_custo"][-1] == pytest.approx(calcular_custo_total(rotas, instancia_pequena))
+    assert np.all(np.diff(arrays["melhor_custo"]) <= 0)
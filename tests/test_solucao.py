@@ -0,0 +1,58 @@
+
+# tests/test_solucao.py
+
+import random
+import pytest
+from heuristics import HEURISTICAS
+from metaheuristics.rvnd import GERADORES
+from solucao import Solucao
+from utils import calcular_vizinhos_proximos
+
+def confere_caches(solucao, dados):
+    """Compara cada cache da Solucao com uma Solucao reconstruída das mesmas rotas."""
+    referencia = Solucao(solucao.rotas, dados)
+    assert solucao.rotas == referencia.rotas
+    assert solucao.cargas == referencia.cargas
+    assert solucao.cargas_acumuladas == referencia.cargas_acumuladas
+    assert solucao.prefixos == referencia.prefixos
+    assert solucao.posicoes == referencia.posicoes
+    assert solucao.custo == pytest.approx(referencia.custo)
+    assert solucao.excedidas == referencia.excedidas
+    assert solucao.integra == referencia.integra
+    assert solucao.completa == referencia.completa
+    assert solucao.valida() == referencia.valida()
+
+def movimento_aleatorio(solucao, candidatos, rng):
+    """Um movimento qualquer (viável ou não) de um gerador sorteado."""
+    while True:
+        cliente = rng.choice(list(solucao.posicoes))
+        movimentos = [m for m, _ in GERADORES[rng.choice(list(GERADORES))](solucao, cliente, candidatos)]
+        if movimentos:
+            return rng.choice(movimentos)
+
+@pytest.mark.parametrize("semente", range(5))
+def test_caches_iguais_aos_reconstruidos_em_sequencia_aleatoria(instancia_pequena, semente):
+    rng = random.Random(semente)
+    solucao = Solucao(HEURISTICAS["Savings"](instancia_pequena), instancia_pequena)
+    candidatos = calcular_vizinhos_proximos(instancia_pequena, 8)
+    for _ in range(150):
+        operacao = rng.choice(("aplicar", "ruina", "desfazer"))
+        if operacao == "aplicar":
+            solucao.aplicar(movimento_aleatorio(solucao, candidatos, rng))
+        elif operacao == "ruina":
+            removidos = rng.sample(list(solucao.posicoes), rng.randint(1, 6))
+            solucao.remover_clientes(removidos)
+            confere_caches(solucao, instancia_pequena)
+            for cliente in removidos:
+                r = rng.randrange(len(solucao.rotas) + 1)   # len(rotas) abre uma rota
+                p = rng.randint(0, len(solucao.rotas[r])) if r < len(solucao.rotas) else 0
+                solucao.inserir_cliente(cliente, r, p)
+                confere_caches(solucao, instancia_pequena)
+        else:
+            anteriores = [rota[:] for rota in solucao.rotas]
+            alteradas = solucao.aplicar(movimento_aleatorio(solucao, candidatos, rng))
+            confere_caches(solucao, instancia_pequena)
+            solucao.restaurar_rotas({r: anteriores[r] for r in alteradas})
+            assert solucao.rotas == anteriores
+        confere_caches(solucao, instancia_pequena)
+    assert solucao.completa
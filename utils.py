@@ -1,122 +1,269 @@
 
 # utils.py
 
-import math
 import random
+import numpy as np
 
-def calcular_distancia(i, j, coordenadas):
+def construir_matriz_distancias(coordenadas, arredondar=False):
     """
-    Calcula a distância euclidiana entre os pontos i e j.
+    Constrói a matriz densa de distâncias euclidianas, indexada pelo id do nó.
+    - coordenadas: dict idx -> (x, y), ou ndarray (id_max + 1, 2) indexado pelo id
+    - arredondar: aplica o arredondamento EUC_2D do TSPLIB (inteiro mais próximo)
+    Linhas/colunas de ids inexistentes ficam preenchidas, mas não devem ser usadas.
     """
-    x1, y1 = coordenadas[i]
-    x2, y2 = coordenadas[j]
-    return math.hypot(x2 - x1, y2 - y1)
+    if isinstance(coordenadas, dict):
+        n_max = max(coordenadas)
+        x = np.zeros(n_max + 1)
+        y = np.zeros(n_max + 1)
+        for idx, (xi, yi) in coordenadas.items():
+            x[idx] = xi
+            y[idx] = yi
+    else:
+        x = np.ascontiguousarray(coordenadas[:, 0], dtype=np.float64)
+        y = np.ascontiguousarray(coordenadas[:, 1], dtype=np.float64)
+    dx = x[:, None] - x[None, :]
+    dy = y[:, None] - y[None, :]
+    distancias = np.sqrt(dx * dx + dy * dy)
+    if arredondar:
+        distancias = np.floor(distancias + 0.5)
+    return distancias
+
+def matriz_distancias_lista(dados):
+    """
+    Retorna a matriz de distâncias como lista de listas, para acesso escalar
+    rápido em laços Python. A conversão é feita uma vez e guardada em dados.
+    """
+    distancias = dados.get('distancias_lista')
+    if distancias is None:
+        distancias = dados['distancias'].tolist()
+        dados['distancias_lista'] = distancias
+    return distancias
+
+def vetor_demandas_por_id(dados):
+    """
+    Retorna as demandas como ndarray indexado pelo id do nó (0 para ids sem demanda).
+    Usa o array da Instancia quando disponível.
+    """
+    if hasattr(dados, 'demandas_por_id'):
+        return dados.demandas_por_id
+    demandas = dados['demandas']
+    vetor = np.zeros(max(demandas) + 1, dtype=np.int64)
+    for idx, demanda in demandas.items():
+        vetor[idx] = demanda
+    return vetor
+
+def ids_clientes(dados):
+    """
+    Ids dos clientes em ordem crescente: todos os nós exceto os depósitos
+    (dados['clientes'] da Instancia; em um dict simples, os nós com demanda
+    exceto o depósito).
+    """
+    clientes = dados.get('clientes')
+    if clientes is None:
+        clientes = sorted(c for c in dados['demandas'] if c != dados['deposito'])
+        dados['clientes'] = clientes
+    return clientes
+
+def mascara_clientes(dados):
+    """
+    bytes indexado pelo id do nó, com 1 nos clientes e 0 nos demais
+    (depósitos e ids inexistentes). Calculado uma vez e guardado em dados.
+    """
+    mascara = dados.get('mascara_clientes')
+    if mascara is None:
+        clientes = ids_clientes(dados)
+        vetor = bytearray(max(clientes, default=0) + 1)
+        for cliente in clientes:
+            vetor[cliente] = 1
+        mascara = bytes(vetor)
+        dados['mascara_clientes'] = mascara
+    return mascara
+
+def calcular_distancia(i, j, distancias):
+    """
+    Retorna a distância entre os nós i e j a partir da matriz pré-calculada
+    (ndarray ou lista de listas indexada pelo id do nó).
+    """
+    return distancias[i][j]
 
 def calcular_custo_total(rotas, dados):
     """
     Soma o custo total das rotas (distância percorrida por todos os veículos).
     """
-    coordenadas = dados['coordenadas']
+    distancias = dados['distancias']
     deposito = dados['deposito']
-    custo = 0.0
+    origens = []
+    destinos = []
     for rota in rotas:
         if not rota:
             continue
         # Rota começa e termina no depósito
-        caminho = [deposito] + rota + [deposito]
-        for i in range(len(caminho) - 1):
-            custo += calcular_distancia(caminho[i], caminho[i+1], coordenadas)
-    return custo
+        origens.append(deposito)
+        origens.extend(rota)
+        destinos.extend(rota)
+        destinos.append(deposito)
+    if not origens:
+        return 0.0
+    return float(distancias[origens, destinos].sum())
 
-def solucao_valida(rotas, dados):
+def solucao_valida(rotas, dados, modo="completo", movimento=None, cargas=None,
+                   cargas_acumuladas=None):
     """
     Verifica se a solução é válida: cada cliente atendido uma vez, capacidade respeitada.
+    - modo "completo": auditoria da solução inteira (O(n), sem criar conjuntos)
+    - modo "local": diz se `movimento` mantém a solução válida, verificando
+      só a capacidade das rotas que ele altera a partir das cargas em cache
+      (`cargas` e, para o 2-opt*, `cargas_acumuladas`, ambas de antes do
+      movimento), em O(1); pressupõe que a solução de partida é válida.
+      É o teste de viabilidade dos movimentos da Tabu Search e da RVND.
     """
+    if modo == "local":
+        capacidade = dados['capacidade']
+        return all(carga <= capacidade for _, carga in
+                   cargas_apos_movimento(rotas, movimento, dados, cargas, cargas_acumuladas))
+    if modo != "completo":
+        raise ValueError(f"Modo de verificação desconhecido: {modo}")
     demandas = dados['demandas']
     capacidade = dados['capacidade']
-    n_clientes = dados['n_clientes']
-    clientes_atendidos = set()
+    # pendente[id] = 1 enquanto o cliente não foi visitado (0 para depósitos e
+    # ids que não são clientes)
+    pendente = bytearray(mascara_clientes(dados))
+    limite = len(pendente)
+    visitas = 0
     for rota in rotas:
         carga = 0
         for cliente in rota:
-            if cliente in clientes_atendidos:
+            if not 0 <= cliente < limite or not pendente[cliente]:
                 return False
-            clientes_atendidos.add(cliente)
+            pendente[cliente] = 0
             carga += demandas[cliente]
         if carga > capacidade:
             return False
-    # Todos clientes atendidos?
-    return clientes_atendidos == set(range(1, n_clientes + 1))
+        visitas += len(rota)
+    # Todos clientes atendidos? (sem repetições, basta contar as visitas)
+    return visitas == len(ids_clientes(dados))
 
 def gerar_solucao_inicial(dados):
     """
     Gera uma solução inicial simples: cada cliente em uma rota separada.
     """
-    n_clientes = dados['n_clientes']
-    return [[i] for i in range(1, n_clientes + 1)]
-
-# Vizinhanças para Tabu Search
-
-def vizinhanca_swap(rotas, dados):
-    """
-    Gera vizinhos trocando dois clientes de rotas diferentes.
-    Retorna lista de tuplas (nova_solucao, movimento).
-    """
-    vizinhos = []
-    for i in range(len(rotas)):
-        for j in range(i+1, len(rotas)):
-            for a in range(len(rotas[i])):
-                for b in range(len(rotas[j])):
-                    nova_rotas = [r[:] for r in rotas]
-                    nova_rotas[i][a], nova_rotas[j][b] = nova_rotas[j][b], nova_rotas[i][a]
-                    movimento = ("swap", i, a, j, b)
-                    if solucao_valida(nova_rotas, dados):
-                        vizinhos.append((nova_rotas, movimento))
-    return vizinhos
-
-def vizinhanca_relocate(rotas, dados):
-    """
-    Gera vizinhos movendo um cliente de uma rota para outra.
-    Retorna lista de tuplas (nova_solucao, movimento).
-    """
-    vizinhos = []
-    for i in range(len(rotas)):
-        for j in range(len(rotas)):
-            if i == j:
-                continue
-            for a in range(len(rotas[i])):
-                cliente = rotas[i][a]
-                for b in range(len(rotas[j]) + 1):
-                    nova_rotas = [r[:] for r in rotas]
-                    # Remove cliente de rota i
-                    nova_rotas[i].pop(a)
-                    # Insere cliente em rota j na posição b
-                    nova_rotas[j].insert(b, cliente)
-                    movimento = ("relocate", i, a, j, b)
-                    # Remove rotas vazias
-                    nova_rotas = [r for r in nova_rotas if r]
-                    if solucao_valida(nova_rotas, dados):
-                        vizinhos.append((nova_rotas, movimento))
-    return vizinhos
-
-def vizinhanca_2opt(rotas, dados):
-    """
-    Gera vizinhos aplicando 2-opt em cada rota (inversão de subcaminho).
-    Retorna lista de tuplas (nova_solucao, movimento).
-    """
-    vizinhos = []
-    for i in range(len(rotas)):
+    return [[i] for i in ids_clientes(dados)]
+
+# Apoio às vizinhanças (metaheuristics/rvnd.py: GERADORES)
+#
+# As vizinhanças não copiam a solução: cada candidato é avaliado pela variação
+# de custo nas arestas afetadas (O(1)) e pela capacidade a partir das cargas
+# em cache de cada rota (cargas_apos_movimento). Apenas o movimento escolhido
+# é materializado, via rotas_apos_movimento (Solucao.aplicar).
+
+def matriz_vizinhos_proximos(dados, k, bloco=1024):
+    """
+    Para cada cliente, os k clientes mais próximos, em ordem crescente de
+    distância. Processa as linhas em blocos para não copiar a matriz inteira.
+    Retorna ndarray (n_clientes, k) de ids; a linha r corresponde ao cliente
+    ids_clientes(dados)[r].
+    """
+    clientes = np.array(ids_clientes(dados), dtype=np.int64)
+    n_clientes = len(clientes)
+    distancias = dados['distancias']
+    k = min(k, n_clientes - 1)
+    proximos = np.empty((n_clientes, k), dtype=np.int64)
+    for inicio in range(0, n_clientes, bloco):
+        fim = min(inicio + bloco, n_clientes)
+        sub = distancias[np.ix_(clientes[inicio:fim], clientes)]
+        linhas = np.arange(fim - inicio)
+        sub[linhas, linhas + inicio] = np.inf
+        parcial = np.argpartition(sub, k - 1, axis=1)[:, :k]
+        ordem = np.take_along_axis(sub, parcial, axis=1).argsort(axis=1, kind='stable')
+        proximos[inicio:fim] = clientes[np.take_along_axis(parcial, ordem, axis=1)]
+    return proximos
+
+def calcular_vizinhos_proximos(dados, k):
+    """
+    Lista de candidatos das vizinhanças granulares: para cada cliente, os k
+    clientes mais próximos, em ordem crescente de distância.
+    Retorna lista indexada pelo id do nó (vazia para os depósitos).
+    """
+    clientes = ids_clientes(dados)
+    candidatos = [[] for _ in range(max(clientes, default=0) + 1)]
+    for cliente, proximos in zip(clientes, matriz_vizinhos_proximos(dados, k).tolist()):
+        candidatos[cliente] = proximos
+    return candidatos
+
+def cargas_apos_movimento(rotas, movimento, dados, cargas, cargas_acumuladas=None):
+    """
+    Retorna [(rota, nova_carga)] das rotas cuja carga o movimento altera
+    (para o 2-opt, a própria rota com a carga inalterada), em O(1); sem
+    cargas_acumuladas, o 2-opt* soma as demandas das cabeças das rotas.
+    """
+    demandas = dados['demandas']
+    tipo = movimento[0]
+    if tipo == "swap":
+        _, i, a, j, b = movimento
+        variacao = demandas[rotas[j][b]] - demandas[rotas[i][a]]
+        return [(i, cargas[i] + variacao), (j, cargas[j] - variacao)]
+    if tipo == "relocate":
+        _, i, a, j, _ = movimento
+        demanda = demandas[rotas[i][a]]
+        return [(i, cargas[i] - demanda), (j, cargas[j] + demanda)]
+    if tipo == "2opt":
+        return [(movimento[1], cargas[movimento[1]])]
+    if tipo == "oropt":
+        _, i, a, tamanho, j, _, _ = movimento
+        if i == j:
+            return [(i, cargas[i])]
+        demanda = sum(demandas[c] for c in rotas[i][a:a + tamanho])
+        return [(i, cargas[i] - demanda), (j, cargas[j] + demanda)]
+    if tipo == "2opt*":
+        _, i, a, j, b = movimento
+        if cargas_acumuladas is not None:
+            cabeca_i = cargas_acumuladas[i][a + 1]
+            cabeca_j = cargas_acumuladas[j][b + 1]
+        else:
+            cabeca_i = sum(demandas[c] for c in rotas[i][:a + 1])
+            cabeca_j = sum(demandas[c] for c in rotas[j][:b + 1])
+        return [(i, cabeca_i + cargas[j] - cabeca_j), (j, cabeca_j + cargas[i] - cabeca_i)]
+    raise ValueError(f"Movimento desconhecido: {tipo}")
+
+def rotas_apos_movimento(rotas, movimento):
+    """
+    Retorna [(rota, nova_rota)] das rotas alteradas pelo movimento (novas
+    listas; as rotas originais não são modificadas).
+    """
+    tipo = movimento[0]
+    if tipo == "swap":
+        _, i, a, j, b = movimento
+        rota_i = rotas[i][:]
+        rota_j = rotas[j][:]
+        rota_i[a], rota_j[b] = rota_j[b], rota_i[a]
+        return [(i, rota_i), (j, rota_j)]
+    if tipo == "relocate":
+        _, i, a, j, b = movimento
+        rota_i = rotas[i][:]
+        rota_j = rotas[j][:]
+        rota_j.insert(b, rota_i.pop(a))
+        return [(i, rota_i), (j, rota_j)]
+    if tipo == "2opt":
+        _, i, a, b = movimento
         rota = rotas[i]
-        n = len(rota)
-        for a in range(n):
-            for b in range(a+2, n+1):
-                nova_rota = rota[:a] + rota[a:b][::-1] + rota[b:]
-                nova_rotas = [r[:] for r in rotas]
-                nova_rotas[i] = nova_rota
-                movimento = ("2opt", i, a, b)
-                if solucao_valida(nova_rotas, dados):
-                    vizinhos.append((nova_rotas, movimento))
-    return vizinhos
+        return [(i, rota[:a] + rota[a:b][::-1] + rota[b:])]
+    if tipo == "oropt":
+        _, i, a, tamanho, j, b, invertido = movimento
+        rota_i = rotas[i]
+        segmento = rota_i[a:a + tamanho]
+        if invertido:
+            segmento.reverse()
+        if i == j:
+            if b < a:
+                return [(i, rota_i[:b] + segmento + rota_i[b:a] + rota_i[a + tamanho:])]
+            return [(i, rota_i[:a] + rota_i[a + tamanho:b] + segmento + rota_i[b:])]
+        rota_j = rotas[j]
+        return [(i, rota_i[:a] + rota_i[a + tamanho:]), (j, rota_j[:b] + segmento + rota_j[b:])]
+    if tipo == "2opt*":
+        _, i, a, j, b = movimento
+        rota_i, rota_j = rotas[i], rotas[j]
+        return [(i, rota_i[:a + 1] + rota_j[b + 1:]), (j, rota_j[:b + 1] + rota_i[a + 1:])]
+    raise ValueError(f"Movimento desconhecido: {tipo}")
 
 def avaliar_solucao(rotas, dados):
     """